@@ -0,0 +1,128 @@
+# Benchmark del arranque en frío de la API en cada modo de ARRANQUE (ver main.py): cada
+# medición es un proceso nuevo que importa main y ejecuta su ciclo de vida, e informa
+# cuánto tarda desde el inicio del proceso en importar la aplicación (cargar el dataset
+# y construir lo que el modo construye al importar), en responder la primera consulta
+# liviana, la primera recomendación y en quedar lista (GET /listo), y si sklearn se
+# importó al importar la aplicación y al quedar lista.
+# Se usa un dataset sintético (--filas) o el de un directorio (--datos). Con
+# --tabla-vecinos se calcula antes la tabla de vecinos (ver vecinos.py), así las
+# recomendaciones no necesitan sklearn.
+# Uso: python -m benchmarks.bench_arranque [--filas 10000 100000 | --datos directorio]
+#      [--modos completo diferido] [--repeticiones N] [--tabla-vecinos]
+#      [--salida resultados.json] [--comparar anterior.json] [--umbral 0.2]
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+# Solo se importa la biblioteca estándar: el proceso de cada medición ejecuta este mismo
+# módulo (con --hijo) y no tiene que haber importado nada antes que main
+
+# Tiempo máximo (segundos) de espera de cada consulta en un arranque
+ESPERA_MAXIMA = 600
+
+# Función: Consultar una ruta hasta que responda 200. Devuelve el momento de la respuesta
+def esperar(cliente, url):
+    limite = time.perf_counter() + ESPERA_MAXIMA
+    while cliente.get(url).status_code != 200:
+        if time.perf_counter() > limite:
+            raise TimeoutError(url)
+        time.sleep(0.01)
+    return time.perf_counter()
+
+# Función: Arrancar la API en este proceso (en el directorio actual) y medir cada etapa
+# desde el inicio
+def arrancar():
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import main
+    importar = time.perf_counter() - inicio
+    sklearn_al_importar = 'sklearn' in sys.modules
+    from fastapi.testclient import TestClient
+    titulo = quote(str(main.recargador.instantanea.data['title'].iat[0]).lower())
+    with TestClient(main.app) as cliente:
+        primera_consulta = esperar(cliente, '/cantidad_filmaciones_mes/enero') - inicio
+        primera_recomendacion = esperar(cliente, f'/recomendacion/{titulo}') - inicio
+        listo = esperar(cliente, '/listo') - inicio
+        sklearn_al_estar_listo = 'sklearn' in sys.modules
+    return {'importar_s': importar, 'primera_consulta_s': primera_consulta,
+            'primera_recomendacion_s': primera_recomendacion, 'listo_s': listo,
+            'sklearn_al_importar': sklearn_al_importar, 'sklearn_al_estar_listo': sklearn_al_estar_listo}
+
+# Función: Medir un arranque en un proceso nuevo con el modo de ARRANQUE indicado
+def medir(directorio, modo):
+    raiz = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    entorno = {**os.environ, 'ARRANQUE': modo,
+               'PYTHONPATH': os.pathsep.join(filter(None, [raiz, os.environ.get('PYTHONPATH')]))}
+    proceso = subprocess.run([sys.executable, '-m', 'benchmarks.bench_arranque', '--hijo'], cwd=directorio,
+                             env=entorno, capture_output=True, text=True, check=True)
+    return json.loads(proceso.stdout.splitlines()[-1])
+
+# Función: Mediana de cada medida de varios arranques (las booleanas, de la primera)
+def resumir(mediciones):
+    return {clave: statistics.median(m[clave] for m in mediciones) if clave.endswith('_s') else valor
+            for clave, valor in mediciones[0].items()}
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Arranque en frío de la API en cada modo de ARRANQUE')
+    parser.add_argument('--filas', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--datos', help='Directorio con el dataset de la API (en lugar del sintético)')
+    parser.add_argument('--modos', nargs='+', choices=['completo', 'diferido'], default=['completo', 'diferido'])
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--tabla-vecinos', action='store_true')
+    parser.add_argument('--hijo', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--salida')
+    parser.add_argument('--comparar')
+    parser.add_argument('--umbral', type=float, default=0.2)
+    args = parser.parse_args()
+
+    if args.hijo:
+        print(json.dumps(arrancar()))
+        sys.exit()
+
+    from benchmarks.resultados import comparar, guardar, metadatos
+    from benchmarks.sinteticos import generar_directorio
+    from carga import RUTA_ARTEFACTO, cargar_datos
+    from vecinos import escribir_vecinos
+
+    directorio_temporal = None if args.datos else tempfile.mkdtemp(prefix='bench_arranque_')
+    conjuntos = {'datos': os.path.abspath(args.datos)} if args.datos else {
+        str(filas): os.path.join(directorio_temporal, str(filas)) for filas in args.filas}
+    resultados = {}
+    try:
+        for nombre, directorio in conjuntos.items():
+            if directorio_temporal is not None:
+                generar_directorio(int(nombre), directorio, args.semilla)
+            if args.tabla_vecinos:
+                ruta = os.path.join(directorio, RUTA_ARTEFACTO)
+                escribir_vecinos(cargar_datos(ruta), ruta)
+            resultados[nombre] = {modo: resumir([medir(directorio, modo) for _ in range(args.repeticiones)])
+                                  for modo in args.modos}
+
+            print(f"\n{nombre} | mediana de {args.repeticiones} arranques, segundos desde el inicio del proceso")
+            print(f"  {'Modo':<12}{'importar':>10}{'1a consulta':>13}{'1a recomend.':>14}{'listo':>9}  sklearn al importar / listo")
+            for modo, medida in resultados[nombre].items():
+                print(f"  {modo:<12}{medida['importar_s']:10.2f}{medida['primera_consulta_s']:13.2f}"
+                      f"{medida['primera_recomendacion_s']:14.2f}{medida['listo_s']:9.2f}  "
+                      f"{'sí' if medida['sklearn_al_importar'] else 'no'} / {'sí' if medida['sklearn_al_estar_listo'] else 'no'}")
+    finally:
+        if directorio_temporal is not None:
+            shutil.rmtree(directorio_temporal, ignore_errors=True)
+
+    resultados = {'metadatos': metadatos(benchmark='arranque', repeticiones=args.repeticiones, semilla=args.semilla,
+                                         datos=args.datos, tabla_vecinos=args.tabla_vecinos,
+                                         modo_ejecucion=os.environ.get('MODO_EJECUCION')),
+                  'resultados': resultados}
+    if args.salida:
+        guardar(resultados, args.salida)
+    if args.comparar and comparar(resultados, args.comparar, args.umbral):
+        sys.exit(1)
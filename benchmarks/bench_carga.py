@@ -0,0 +1,56 @@
+# Benchmark de arranque en frío: tiempo de carga y memoria residente (RSS) de cada forma
+# de leer el dataset, cada una medida en un proceso nuevo.
+# Uso (Linux): python -m benchmarks.bench_carga [ruta_csv] [ruta_parquet]
+# Si el artefacto Parquet no existe, se genera a partir del CSV
+import os
+import subprocess
+import sys
+import pandas as pd
+from carga import escribir_artefacto
+
+CODIGO = """
+import time
+def rss_kb():
+    with open('/proc/self/status') as estado:
+        return next(int(linea.split()[1]) for linea in estado if linea.startswith('VmRSS'))
+inicio = time.perf_counter()
+import pandas as pd
+import carga
+importacion = time.perf_counter() - inicio
+rss_inicial = rss_kb()
+inicio = time.perf_counter()
+{carga}
+segundos = time.perf_counter() - inicio
+print(importacion, segundos, rss_kb(), rss_kb() - rss_inicial)
+"""
+
+MODOS = {
+    # Antes: CSV completo con todas las columnas, como hacía main.py
+    'CSV completo': "data = pd.read_csv({csv!r})",
+    # Respaldo: CSV leyendo solo las columnas de la API
+    'CSV con proyección': "from carga import cargar_datos\ndata = cargar_datos('', {csv!r})",
+    # Después: artefacto Parquet leyendo solo las columnas de la API
+    'Parquet con proyección': "from carga import cargar_datos\ndata = cargar_datos({parquet!r})",
+}
+
+def medir(carga, repeticiones=3):
+    resultados = []
+    for _ in range(repeticiones):
+        salida = subprocess.run([sys.executable, '-c', CODIGO.format(carga=carga)],
+                                capture_output=True, text=True, check=True)
+        importacion, segundos, rss_kb, rss_datos_kb = salida.stdout.split()
+        resultados.append((float(segundos), float(importacion), int(rss_kb) / 1024, int(rss_datos_kb) / 1024))
+    # Se reporta la mejor repetición (la menos afectada por ruido del sistema)
+    return min(resultados)
+
+if __name__ == '__main__':
+    csv = sys.argv[1] if len(sys.argv) > 1 else 'data_preparadaML.csv'
+    parquet = sys.argv[2] if len(sys.argv) > 2 else 'data_preparadaML.parquet'
+    if not os.path.exists(parquet):
+        escribir_artefacto(pd.read_csv(csv), parquet)
+
+    print(f"CSV: {os.path.getsize(csv) / 2**20:.1f} MB | Parquet: {os.path.getsize(parquet) / 2**20:.1f} MB")
+    for nombre, carga in MODOS.items():
+        segundos, importacion, rss_mb, rss_datos_mb = medir(carga.format(csv=csv, parquet=parquet))
+        print(f"{nombre:<24} carga {segundos * 1e3:7.1f} ms (+ {importacion * 1e3:.0f} ms de imports)"
+              f"   RSS {rss_mb:6.1f} MB (+{rss_datos_mb:.1f} MB por los datos)")
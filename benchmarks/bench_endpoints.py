@@ -0,0 +1,113 @@
+# Micro-benchmarks de los endpoints: cada función de main.py se llama directamente (sin
+# HTTP ni caché) sobre datasets sintéticos de distintos tamaños, y se informan la media y
+# los percentiles 50, 95 y 99 de cada una. También se mide el tiempo de carga del
+# dataset con sus índices y el recomendador.
+# Con --tabla-vecinos se calcula antes la tabla de vecinos de cada dataset (ver
+# vecinos.py), así las recomendaciones salen de la tabla en lugar del modelo.
+# Los resultados se pueden guardar en JSON (--salida) y comparar con una ejecución
+# anterior (--comparar): si alguna medida empeora más que el umbral, termina con error.
+# Uso: python -m benchmarks.bench_endpoints [--filas 10000 100000 1000000] [--repeticiones N]
+#      [--tabla-vecinos] [--salida resultados.json] [--comparar anterior.json] [--umbral 0.2]
+import argparse
+import contextlib
+import importlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+from benchmarks.resultados import comparar, guardar, metadatos, percentiles
+from benchmarks.sinteticos import generar_directorio
+from carga import cargar_datos
+from vecinos import escribir_vecinos
+
+MESES = ['enero', 'febrero', 'marzo', 'abril', 'mayo', 'junio', 'julio', 'agosto',
+         'septiembre', 'octubre', 'noviembre', 'diciembre']
+DIAS = ['lunes', 'martes', 'miércoles', 'jueves', 'viernes', 'sábado', 'domingo']
+
+# Función: Parámetros de las consultas de cada endpoint: títulos, actores y directores
+# tomados al azar del dataset, más uno que no existe
+def armar_consultas(data, cantidad=50, semilla=0):
+    muestra = data.sample(min(cantidad, len(data)), random_state=semilla)
+    titulos = muestra['title'].str.lower().tolist() + ['película que no existe']
+    actores = muestra['actor'].dropna().str.split(',').str[0].str.strip().str.lower().tolist()
+    directores = muestra['director'].dropna().astype(str).str.lower().tolist()
+    return {
+        'cantidad_filmaciones_mes': [{'mes': mes} for mes in MESES]
+                                    + [{'mes': 'marzo', 'anio_desde': 2000, 'anio_hasta': 2010}],
+        'cantidad_filmaciones_dia': [{'dia': dia} for dia in DIAS]
+                                    + [{'dia': 'lunes', 'anio_desde': 2000, 'anio_hasta': 2010}],
+        'score_titulo': [{'titulo_de_la_filmacion': titulo} for titulo in titulos],
+        'votos_titulo': [{'titulo_de_la_pelicula': titulo} for titulo in titulos],
+        'get_actor': [{'nombre_actor': actor} for actor in actores + ['actor que no existe']],
+        'get_director': [{'nombre_director': director} for director in directores + ['director que no existe']]
+                        + [{'nombre_director': directores[0], 'sort': '-retorno_pelicula', 'limit': 10}],
+        'recomendacion': [{'titulo': titulo} for titulo in titulos],
+        # Autocompletar con el comienzo de cada título y con un error de tipeo (letras cambiadas)
+        'buscar': [{'titulo': titulo[:max(3, len(titulo) // 2)]} for titulo in titulos]
+                  + [{'titulo': titulo[:2] + titulo[3:1:-1] + titulo[4:]} for titulo in titulos],
+    }
+
+# Función: Llamar a la función con cada consulta (en ciclo) y medir cada llamada
+def medir(funcion, consultas, repeticiones):
+    duraciones = []
+    for i in range(repeticiones):
+        parametros = consultas[i % len(consultas)]
+        inicio = time.perf_counter()
+        funcion(**parametros)
+        duraciones.append(time.perf_counter() - inicio)
+    return percentiles(duraciones)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Micro-benchmarks de los endpoints sobre datasets sintéticos')
+    parser.add_argument('--filas', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeticiones', type=int, default=500)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--tabla-vecinos', action='store_true')
+    parser.add_argument('--salida')
+    parser.add_argument('--comparar')
+    parser.add_argument('--umbral', type=float, default=0.2)
+    args = parser.parse_args()
+
+    directorio_base = tempfile.mkdtemp(prefix='bench_endpoints_')
+    directorio_inicial = os.getcwd()
+    main = None
+    resultados = {}
+    try:
+        for filas in args.filas:
+            directorio = os.path.join(directorio_base, str(filas))
+            ruta = generar_directorio(filas, directorio, args.semilla)
+            if args.tabla_vecinos:
+                escribir_vecinos(cargar_datos(ruta), ruta)
+            os.chdir(directorio)
+
+            # La API lee el dataset del directorio actual: la primera vez se importa main y
+            # después se publica una instantánea nueva con el dataset de este tamaño
+            with contextlib.redirect_stdout(io.StringIO()):
+                if main is None:
+                    main = importlib.import_module('main')
+                inicio = time.perf_counter()
+                main.recargador.instantanea = main.cargar_instantanea()
+                carga = time.perf_counter() - inicio
+
+            consultas = armar_consultas(main.recargador.instantanea.data, semilla=args.semilla)
+            endpoints = {nombre: medir(getattr(main, nombre), parametros, args.repeticiones)
+                         for nombre, parametros in consultas.items()}
+            resultados[str(filas)] = {'carga_s': carga, 'endpoints': endpoints}
+
+            print(f"\n{filas} filas | carga, índices y recomendador: {carga:.2f} s")
+            print(f"  {'Endpoint':<28}{'media':>11}{'p50':>11}{'p95':>11}{'p99':>11}  (µs)")
+            for nombre, medidas in endpoints.items():
+                print(f"  {nombre:<28}" + ''.join(f"{medidas[clave]:11.1f}" for clave in ('media_us', 'p50_us', 'p95_us', 'p99_us')))
+    finally:
+        os.chdir(directorio_inicial)
+        shutil.rmtree(directorio_base, ignore_errors=True)
+
+    resultados = {'metadatos': metadatos(benchmark='endpoints', repeticiones=args.repeticiones, semilla=args.semilla,
+                                         tabla_vecinos=args.tabla_vecinos),
+                  'resultados': resultados}
+    if args.salida:
+        guardar(resultados, args.salida)
+    if args.comparar and comparar(resultados, args.comparar, args.umbral):
+        sys.exit(1)
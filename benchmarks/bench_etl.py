@@ -0,0 +1,42 @@
+# Benchmark del paso más lento del ETL: extraer actores y directores de credits.csv.
+# Compara el .apply del notebook (re.findall sobre cada fila, un solo núcleo) con
+# etl.leer_creditos por bloques y con distinta cantidad de procesos.
+# Uso: python -m benchmarks.bench_etl [ruta_credits] [procesos separados por coma]
+import os
+import re
+import sys
+import time
+import pandas as pd
+from etl import RUTA_CREDITOS, leer_creditos
+
+# Versión del notebook: lee todo el archivo y aplica la regex fila por fila
+def notebook(ruta):
+    def extract_concatenate_data(custom_pattern, text):
+        matches = re.findall(custom_pattern, text)
+        return ', '.join(matches)
+
+    name_pattern = r"'name':\s+'(.*?)'"
+    director_pattern = r"'job': 'Director', 'name':\s+'(.*?)'"
+    credits = pd.read_csv(ruta)
+    credits['actor'] = credits['cast'].apply(lambda x: extract_concatenate_data(name_pattern, str(x)))
+    credits['director'] = credits['crew'].apply(lambda x: extract_concatenate_data(director_pattern, str(x)))
+    credits = credits.drop(columns=['cast', 'crew']).drop_duplicates(subset='id')
+    return credits[['id', 'actor', 'director']].reset_index(drop=True)
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+if __name__ == '__main__':
+    ruta = sys.argv[1] if len(sys.argv) > 1 else RUTA_CREDITOS
+    nucleos = os.cpu_count() or 1
+    lista_procesos = [int(p) for p in sys.argv[2].split(',')] if len(sys.argv) > 2 else sorted({1, 2, 4, nucleos})
+
+    print(f"credits: {os.path.getsize(ruta) / 2**20:.1f} MB | núcleos: {nucleos}")
+    t_notebook, referencia = medir(notebook, ruta)
+    print(f"{'.apply del notebook':<24} {t_notebook:7.2f} s")
+    for procesos in lista_procesos:
+        segundos, (creditos, _) = medir(leer_creditos, ruta, 5000, procesos)
+        pd.testing.assert_frame_equal(creditos, referencia, check_dtype=False)
+        print(f"{f'leer_creditos x{procesos}':<24} {segundos:7.2f} s   {t_notebook / segundos:4.1f}x")
@@ -0,0 +1,80 @@
+# Benchmark de la actualización incremental de los índices y del recomendador frente a
+# construirlos de cero, con una versión nueva del dataset en la que una parte de las
+# películas se modificó, se eliminó o se agregó (como la que deja etl.py --incremental).
+# También verifica que los dos caminos den exactamente el mismo resultado.
+# Uso: python -m benchmarks.bench_incremental [ruta_parquet] [proporción de cambios]
+import sys
+import time
+import numpy as np
+import pandas as pd
+from carga import RUTA_ARTEFACTO, cargar_datos, compactar
+from indices import IndiceActores, IndiceDirectores, IndiceTitulos, calcular_origen
+from recomendador import MotorRecomendacion
+from serializacion import a_json
+
+# Función: Simular una versión nueva del dataset: un tercio de los cambios son películas
+# modificadas (título, popularidad, géneros, actores y director), otro tercio eliminadas
+# y otro tercio agregadas al final. Devuelve el dataset nuevo y los ids modificados
+def nueva_version(data, proporcion, semilla=0):
+    rng = np.random.default_rng(semilla)
+    cantidad = max(1, int(len(data) * proporcion / 3))
+    nueva = data.copy()
+    modificadas = rng.choice(len(data), cantidad, replace=False)
+    columnas = [nueva.columns.get_loc(c) for c in ['title', 'popularity', 'genre', 'actor', 'director']]
+    nueva.iloc[modificadas, columnas] = [['Título modificado', 99.5, 'Documentary', 'Actriz Nueva', 'Directora Nueva']]
+    eliminadas = rng.choice(np.setdiff1d(np.arange(len(data)), modificadas), cantidad, replace=False)
+    agregadas = data.iloc[rng.choice(len(data), cantidad)].copy()
+    agregadas['id'] = data['id'].max() + 1 + np.arange(cantidad)
+    agregadas['genre'] = 'Western'
+    nueva = pd.concat([nueva.drop(index=nueva.index[eliminadas]), agregadas], ignore_index=True)
+    return nueva, data['id'].iloc[modificadas].tolist()
+
+def medir(funcion, *args):
+    inicio = time.perf_counter()
+    resultado = funcion(*args)
+    return time.perf_counter() - inicio, resultado
+
+# Funciones: Comparar el resultado incremental con el construido de cero
+def iguales_titulos(a, b):
+    return a._posiciones == b._posiciones
+
+def iguales_actores(a, b):
+    return a._actores == b._actores and a._nombres == b._nombres and np.array_equal(a._posiciones, b._posiciones)
+
+def iguales_directores(a, b):
+    return a._directores.keys() == b._directores.keys() and all(
+        total == b._directores[clave][0] and pd.DataFrame(peliculas).equals(pd.DataFrame(b._directores[clave][1]))
+        and a_json(serializadas) == a_json(b._directores[clave][2])
+        for clave, (total, peliculas, serializadas) in a._directores.items())
+
+def iguales_motor(a, b, data):
+    muestra = np.arange(0, len(data), max(1, len(data) // 2000))
+    return (a._estado[3] == b._estado[3] and np.array_equal(a._estado[1], b._estado[1])
+            and a.recomendar_lote(muestra) == b.recomendar_lote(muestra))
+
+if __name__ == '__main__':
+    ruta = sys.argv[1] if len(sys.argv) > 1 else RUTA_ARTEFACTO
+    proporcion = float(sys.argv[2]) if len(sys.argv) > 2 else 0.01
+    data = cargar_datos(ruta, compacto=False)
+    nueva, modificados = nueva_version(data, proporcion)
+    data, nueva = compactar(data), compactar(nueva)
+    origen = calcular_origen(data['id'], nueva['id'], modificados)
+    print(f"Filas: {len(data)} -> {len(nueva)} | filas nuevas o modificadas: {(origen < 0).sum()}")
+
+    estructuras = [
+        ('Índice de títulos', lambda d: IndiceTitulos(d['title']),
+         lambda e, d: e.actualizar(d['title'], origen), iguales_titulos),
+        ('Índice de actores', lambda d: IndiceActores(d['actor'], d['return']),
+         lambda e, d: e.actualizar(d['actor'], d['return'], origen), iguales_actores),
+        ('Índice de directores', IndiceDirectores, lambda e, d: e.actualizar(d, origen), iguales_directores),
+        ('Recomendador', MotorRecomendacion, lambda e, d: e.actualizar(d, origen),
+         lambda a, b: iguales_motor(a, b, nueva)),
+    ]
+    for nombre, construir, actualizar, iguales in estructuras:
+        anterior = construir(data)
+        t_completo, completo = medir(construir, nueva)
+        t_incremental, incremental = medir(actualizar, anterior, nueva)
+        if not iguales(incremental, completo):
+            sys.exit(f"{nombre}: la actualización incremental no coincide con la construcción completa")
+        print(f"{nombre:<22} de cero {t_completo * 1e3:8.1f} ms   incremental {t_incremental * 1e3:8.1f} ms"
+              f"   {t_completo / t_incremental:5.1f}x")
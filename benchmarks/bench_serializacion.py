@@ -0,0 +1,55 @@
+# Micro-benchmark: costo de serializar la respuesta de cada endpoint con la codificación
+# anterior (jsonable_encoder + json.dumps) y con la actual (orjson con soporte de numpy
+# y listas de películas ya serializadas). Solo se mide la serialización: el resultado
+# de cada endpoint se calcula una vez antes de medir.
+# Se ejecuta desde el directorio de los datos, igual que la API.
+# Uso: python -m benchmarks.bench_serializacion [repeticiones]
+import json
+import sys
+import time
+from fastapi.encoders import jsonable_encoder
+import main
+from serializacion import a_json
+
+# Función: Serialización anterior de las respuestas
+def a_json_anterior(resultado):
+    return json.dumps(jsonable_encoder(resultado), ensure_ascii=False, allow_nan=False,
+                      separators=(',', ':')).encode('utf-8')
+
+def medir(funcion, resultado, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        funcion(resultado)
+    return (time.perf_counter() - inicio) / repeticiones
+
+if __name__ == '__main__':
+    repeticiones = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    instantanea = main.recargador.instantanea
+    titulos = instantanea.data['title'].dropna().sample(100, random_state=0).tolist()
+    actor = instantanea.data['actor'].dropna().iloc[0].split(',')[0]
+    # El director con más películas (la respuesta más grande de get_director)
+    director = max(instantanea.indice_directores._directores.items(), key=lambda item: len(item[1][1]))[0]
+
+    resultado_director = main.get_director(director)
+    casos = [
+        ('score_titulo', main.score_titulo(titulos[0]), None),
+        ('votos_titulo', main.votos_titulo(titulos[0]), None),
+        ('get_actor', main.get_actor(actor), None),
+        # Antes get_director devolvía la lista de diccionarios, que se serializaba en cada consulta
+        (f'get_director ({resultado_director["cantidad_peliculas"]} películas)', resultado_director,
+         dict(resultado_director, peliculas=json.loads(a_json(resultado_director['peliculas'])))),
+        ('get_director ordenado', main.get_director(director, sort='-retorno_pelicula'), None),
+        ('recomendacion', main.recomendacion(titulos[0]), None),
+        ('lote/score_titulo (100)', main.score_titulo_lote(main.Lote(claves=titulos)), None),
+        ('lote/votos_titulo (100)', main.votos_titulo_lote(main.Lote(claves=titulos)), None),
+        ('lote/recomendacion (100)', main.recomendacion_lote(main.Lote(claves=titulos)), None),
+    ]
+
+    print(f"{'Endpoint':<32}{'anterior':>12}{'orjson':>12}")
+    for nombre, resultado, resultado_anterior in casos:
+        resultado_anterior = resultado if resultado_anterior is None else resultado_anterior
+        if json.loads(a_json(resultado)) != json.loads(a_json_anterior(resultado_anterior)):
+            sys.exit(f"{nombre}: las dos serializaciones no coinciden")
+        t_anterior = medir(a_json_anterior, resultado_anterior, repeticiones)
+        t_actual = medir(a_json, resultado, repeticiones)
+        print(f"{nombre:<32}{t_anterior * 1e6:9.1f} µs{t_actual * 1e6:9.2f} µs   {t_anterior / t_actual:6.1f}x")
@@ -0,0 +1,40 @@
+# Micro-benchmark: búsqueda de títulos recorriendo la columna vs. índice de títulos
+# Uso: python -m benchmarks.bench_titulos [ruta_csv] [repeticiones]
+import sys
+import time
+import pandas as pd
+from indices import IndiceTitulos
+
+def medir(funcion, consultas, repeticiones):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for consulta in consultas:
+            funcion(consulta)
+    return (time.perf_counter() - inicio) / (repeticiones * len(consultas))
+
+if __name__ == '__main__':
+    ruta = sys.argv[1] if len(sys.argv) > 1 else 'data_preparadaML.csv'
+    repeticiones = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    data = pd.read_csv(ruta)
+
+    # Consultas: una muestra de títulos existentes más uno que no existe
+    consultas = data['title'].dropna().sample(20, random_state=0).str.lower().tolist()
+    consultas.append('película que no existe')
+
+    # Búsqueda anterior: minúsculas sobre toda la columna y comparación fila por fila
+    def recorrido(titulo):
+        pelicula = data[data['title'].str.lower() == titulo]
+        return None if pelicula.empty else pelicula.index[0]
+
+    inicio = time.perf_counter()
+    indice = IndiceTitulos(data['title'])
+    construccion = time.perf_counter() - inicio
+
+    t_recorrido = medir(recorrido, consultas, repeticiones)
+    t_indice = medir(indice.buscar, consultas, repeticiones * 100)
+
+    print(f"Filas: {len(data)} | títulos únicos: {len(indice)}")
+    print(f"Construcción del índice: {construccion * 1e3:.1f} ms")
+    print(f"Recorrido de la columna: {t_recorrido * 1e6:.1f} µs por búsqueda")
+    print(f"Índice de títulos:       {t_indice * 1e6:.2f} µs por búsqueda")
+    print(f"Aceleración: {t_recorrido / t_indice:.0f}x")
@@ -0,0 +1,80 @@
+# Benchmark de la tabla de vecinos precalculada (vecinos.py) sobre datasets sintéticos:
+# tiempo de cálculo y tamaño de la tabla, y latencia de una recomendación con el modelo
+# (kneighbors en cada consulta) y con la tabla (una selección de filas). También informa
+# cuántas recomendaciones coinciden: solo pueden diferir en el orden de vecinos que
+# están exactamente a la misma distancia.
+# Uso: python -m benchmarks.bench_vecinos [--filas 10000 50000] [--repeticiones N]
+#      [--salida resultados.json] [--comparar anterior.json] [--umbral 0.2]
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+import numpy as np
+from benchmarks.resultados import comparar, guardar, metadatos, percentiles
+from benchmarks.sinteticos import generar_directorio
+from carga import cargar_datos
+from recomendador import MotorRecomendacion
+from vecinos import MotorTabla, escribir_vecinos, leer_vecinos, rutas_vecinos
+
+# Función: Medir cada recomendación de las posiciones indicadas
+def medir(motor, posiciones):
+    duraciones = []
+    for posicion in posiciones:
+        inicio = time.perf_counter()
+        motor.recomendar(posicion)
+        duraciones.append(time.perf_counter() - inicio)
+    return percentiles(duraciones)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tabla de vecinos precalculada frente al modelo')
+    parser.add_argument('--filas', type=int, nargs='+', default=[10000, 50000])
+    parser.add_argument('--repeticiones', type=int, default=300)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida')
+    parser.add_argument('--comparar')
+    parser.add_argument('--umbral', type=float, default=0.2)
+    args = parser.parse_args()
+
+    directorio_base = tempfile.mkdtemp(prefix='bench_vecinos_')
+    resultados = {}
+    try:
+        for filas in args.filas:
+            ruta = generar_directorio(filas, os.path.join(directorio_base, str(filas)), args.semilla)
+            data = cargar_datos(ruta)
+
+            inicio = time.perf_counter()
+            escribir_vecinos(data, ruta)
+            calculo = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            tabla = leer_vecinos(data, ruta)
+            apertura = time.perf_counter() - inicio
+            inicio = time.perf_counter()
+            modelo = MotorRecomendacion(data)
+            ajuste = time.perf_counter() - inicio
+            motor_tabla = MotorTabla(data, tabla)
+            tamanio = sum(os.path.getsize(archivo) for archivo in rutas_vecinos(ruta)) / 1e6
+
+            posiciones = np.random.default_rng(args.semilla).integers(0, filas, args.repeticiones)
+            medidas = {'modelo': medir(modelo, posiciones), 'tabla': medir(motor_tabla, posiciones)}
+            iguales = np.mean([modelo.recomendar(posicion) == motor_tabla.recomendar(posicion) for posicion in posiciones])
+            resultados[str(filas)] = {'calculo_tabla_s': calculo, 'apertura_tabla_s': apertura,
+                                      'ajuste_modelo_s': ajuste, 'tamanio_tabla_mb': tamanio,
+                                      'coincidencias': float(iguales), 'recomendacion': medidas}
+
+            print(f"\n{filas} filas | tabla: cálculo {calculo:.2f} s, apertura {apertura * 1e3:.1f} ms, "
+                  f"{tamanio:.1f} MB | ajuste del modelo al cargar: {ajuste:.2f} s | "
+                  f"recomendaciones iguales: {iguales:.1%}")
+            print(f"  {'Recomendación':<28}{'media':>11}{'p50':>11}{'p95':>11}{'p99':>11}  (µs)")
+            for nombre, medida in medidas.items():
+                print(f"  {nombre:<28}" + ''.join(f"{medida[clave]:11.1f}" for clave in ('media_us', 'p50_us', 'p95_us', 'p99_us')))
+    finally:
+        shutil.rmtree(directorio_base, ignore_errors=True)
+
+    resultados = {'metadatos': metadatos(benchmark='vecinos', repeticiones=args.repeticiones, semilla=args.semilla),
+                  'resultados': resultados}
+    if args.salida:
+        guardar(resultados, args.salida)
+    if args.comparar and comparar(resultados, args.comparar, args.umbral):
+        sys.exit(1)
@@ -0,0 +1,138 @@
+# Prueba de carga HTTP dentro del mismo proceso: un cliente ASGI local (httpx con
+# ASGITransport, sin red ni servidor) envía consultas concurrentes a la aplicación con
+# una mezcla de todos los endpoints, e informa los percentiles 50, 95 y 99 de la latencia
+# y las consultas por segundo, en total y por ruta. Requiere httpx (el mismo cliente que
+# usa el TestClient de FastAPI).
+# Se usa un dataset sintético (--filas) o el de un directorio (--datos). La aplicación se
+# configura con las mismas variables de entorno que en producción (MODO_EJECUCION,
+# CACHE_MAX_ENTRADAS, ...): por ejemplo CACHE_MAX_ENTRADAS=0 mide sin caché.
+# Los resultados se pueden guardar en JSON y comparar con una ejecución anterior, igual
+# que en bench_endpoints.
+# Uso: python -m benchmarks.carga_http [--filas 10000 | --datos directorio] [--consultas N]
+#      [--concurrencia N] [--salida resultados.json] [--comparar anterior.json] [--umbral 0.2]
+import argparse
+import asyncio
+import contextlib
+import importlib
+import io
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from urllib.parse import quote
+import httpx
+from benchmarks.bench_endpoints import DIAS, MESES
+from benchmarks.resultados import comparar, guardar, metadatos, percentiles
+from benchmarks.sinteticos import generar_directorio
+
+# Función: Mezcla de consultas (ruta de la plantilla, URL) con valores tomados del dataset
+def armar_consultas(data, cantidad, semilla=0):
+    rng = random.Random(semilla)
+    muestra = data.sample(min(200, len(data)), random_state=semilla)
+    titulos = [quote(titulo) for titulo in muestra['title'].str.lower()] + ['pelicula%20que%20no%20existe']
+    actores = [quote(actor) for actor in muestra['actor'].dropna().str.split(',').str[0].str.strip().str.lower()]
+    directores = [quote(director) for director in muestra['director'].dropna().astype(str).str.lower()]
+    generadores = [
+        ('/cantidad_filmaciones_mes/{mes}', lambda: f'/cantidad_filmaciones_mes/{rng.choice(MESES)}'),
+        ('/cantidad_filmaciones_dia/{dia}', lambda: f'/cantidad_filmaciones_dia/{quote(rng.choice(DIAS))}'),
+        ('/score_titulo/{titulo_de_la_filmacion}', lambda: f'/score_titulo/{rng.choice(titulos)}'),
+        ('/votos_titulo/{titulo_de_la_pelicula}', lambda: f'/votos_titulo/{rng.choice(titulos)}'),
+        ('/get_actor/{nombre_actor}', lambda: f'/get_actor/{rng.choice(actores)}'),
+        ('/get_director/{nombre_director}', lambda: f'/get_director/{rng.choice(directores)}'),
+        ('/recomendacion/{titulo}', lambda: f'/recomendacion/{rng.choice(titulos)}'),
+        ('/buscar', lambda: f'/buscar?titulo={rng.choice(titulos)[:rng.randint(3, 12)]}'),
+    ]
+    consultas = []
+    for _ in range(cantidad):
+        ruta, generar = rng.choice(generadores)
+        consultas.append((ruta, generar()))
+    return consultas
+
+# Función: Enviar todas las consultas con la concurrencia indicada. Devuelve la duración
+# total y, por ruta, las latencias y los códigos de estado
+async def ejecutar_carga(app, consultas, concurrencia):
+    latencias, estados = defaultdict(list), defaultdict(lambda: defaultdict(int))
+    pendientes = iter(consultas)
+
+    async def cliente(http):
+        for ruta, url in pendientes:
+            inicio = time.perf_counter()
+            respuesta = await http.get(url)
+            latencias[ruta].append(time.perf_counter() - inicio)
+            estados[ruta][respuesta.status_code] += 1
+            # Sin red de por medio, una consulta a un endpoint async liviano termina sin
+            # ceder nunca el event loop; se cede aquí (como lo haría la lectura del socket)
+            # para que las demás consultas en curso puedan avanzar
+            await asyncio.sleep(0)
+
+    transporte = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transporte, base_url='http://benchmark') as http:
+        inicio = time.perf_counter()
+        await asyncio.gather(*(cliente(http) for _ in range(concurrencia)))
+        duracion = time.perf_counter() - inicio
+    return duracion, latencias, estados
+
+async def principal(main, args):
+    consultas = armar_consultas(main.recargador.instantanea.data, args.consultas, args.semilla)
+    # ASGITransport no ejecuta el ciclo de vida de la aplicación: se ejecuta aquí (arranca
+    # el pool de procesos en el modo 'procesos')
+    async with main.app.router.lifespan_context(main.app):
+        await ejecutar_carga(main.app, consultas[:args.calentamiento], args.concurrencia)
+        main.cache_respuestas.invalidar()
+        return await ejecutar_carga(main.app, consultas, args.concurrencia)
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Prueba de carga HTTP en el mismo proceso (cliente ASGI)')
+    parser.add_argument('--filas', type=int, default=10000)
+    parser.add_argument('--datos', help='Directorio con el dataset de la API (en lugar del sintético)')
+    parser.add_argument('--consultas', type=int, default=5000)
+    parser.add_argument('--concurrencia', type=int, default=16)
+    parser.add_argument('--calentamiento', type=int, default=200)
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--salida')
+    parser.add_argument('--comparar')
+    parser.add_argument('--umbral', type=float, default=0.2)
+    args = parser.parse_args()
+
+    directorio_inicial = os.getcwd()
+    directorio_temporal = None
+    if args.datos:
+        directorio = os.path.abspath(args.datos)
+    else:
+        directorio = directorio_temporal = tempfile.mkdtemp(prefix='carga_http_')
+        generar_directorio(args.filas, directorio, args.semilla)
+    try:
+        os.chdir(directorio)
+        with contextlib.redirect_stdout(io.StringIO()):
+            main = importlib.import_module('main')
+        duracion, latencias, estados = asyncio.run(principal(main, args))
+    finally:
+        os.chdir(directorio_inicial)
+        if directorio_temporal is not None:
+            shutil.rmtree(directorio_temporal, ignore_errors=True)
+
+    todas = [latencia for lista in latencias.values() for latencia in lista]
+    resultados = {'total': {'consultas': len(todas), 'rps': len(todas) / duracion, **percentiles(todas)}}
+    for ruta in sorted(latencias):
+        resultados[ruta] = {'consultas': len(latencias[ruta]), **percentiles(latencias[ruta]),
+                            'estados': {str(estado): cantidad for estado, cantidad in sorted(estados[ruta].items())}}
+
+    print(f"{len(todas)} consultas en {duracion:.2f} s con concurrencia {args.concurrencia}: "
+          f"{resultados['total']['rps']:.0f} consultas por segundo")
+    print(f"  {'Ruta':<42}{'consultas':>10}{'p50':>11}{'p95':>11}{'p99':>11}  (µs)")
+    for ruta, medidas in resultados.items():
+        print(f"  {ruta:<42}{medidas['consultas']:>10}"
+              + ''.join(f"{medidas[clave]:11.1f}" for clave in ('p50_us', 'p95_us', 'p99_us')))
+
+    configuracion = {variable: os.environ.get(variable) for variable in ('MODO_EJECUCION', 'POOL_PROCESOS', 'CACHE_MAX_ENTRADAS')}
+    resultados = {'metadatos': metadatos(benchmark='carga_http', filas=None if args.datos else args.filas,
+                                         datos=args.datos, consultas=args.consultas,
+                                         concurrencia=args.concurrencia, semilla=args.semilla, **configuracion),
+                  'resultados': resultados}
+    if args.salida:
+        guardar(resultados, args.salida)
+    if args.comparar and comparar(resultados, args.comparar, args.umbral):
+        sys.exit(1)
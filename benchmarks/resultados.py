@@ -0,0 +1,76 @@
+# Resultados de los benchmarks en JSON: se guardan con los datos del entorno (commit,
+# versiones, CPU) para poder comparar ejecuciones, y comparar() marca como regresión
+# toda medida que empeoró más que el umbral respecto de una ejecución anterior
+import datetime
+import json
+import os
+import platform
+import subprocess
+import numpy as np
+import pandas as pd
+import sklearn
+
+# Función: Datos del entorno en el que se ejecutó el benchmark
+def metadatos(**extra):
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {'fecha': datetime.datetime.now().isoformat(timespec='seconds'), 'commit': commit,
+            'python': platform.python_version(), 'plataforma': platform.platform(),
+            'cpus': os.cpu_count(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'sklearn': sklearn.__version__, **extra}
+
+# Función: Percentiles (en microsegundos) de una lista de duraciones en segundos
+def percentiles(duraciones):
+    duraciones = np.asarray(duraciones) * 1e6
+    p50, p95, p99 = np.percentile(duraciones, [50, 95, 99])
+    return {'media_us': float(duraciones.mean()), 'p50_us': float(p50), 'p95_us': float(p95), 'p99_us': float(p99)}
+
+def guardar(resultados, ruta):
+    directorio = os.path.dirname(ruta)
+    if directorio:
+        os.makedirs(directorio, exist_ok=True)
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(resultados, archivo, ensure_ascii=False, indent=2)
+
+# Función: Aplanar los resultados a {'a/b/c': valor} con solo las medidas numéricas
+def aplanar(resultados, prefijo=''):
+    planos = {}
+    for clave, valor in resultados.items():
+        if isinstance(valor, dict):
+            planos.update(aplanar(valor, f'{prefijo}{clave}/'))
+        elif isinstance(valor, (int, float)) and not isinstance(valor, bool):
+            planos[f'{prefijo}{clave}'] = valor
+    return planos
+
+# Función: Si una medida empeoró. Los tiempos (media, p50, p95 y los que terminan en _s)
+# empeoran si aumentan; rps (consultas por segundo) si disminuye. El p99 se muestra pero
+# no se marca: con pocas repeticiones varía demasiado entre ejecuciones
+def empeoro(clave, anterior, actual, umbral):
+    if clave.endswith(('media_us', 'p50_us', 'p95_us', '_s')):
+        return actual > anterior * (1 + umbral)
+    if clave.endswith('rps'):
+        return actual < anterior * (1 - umbral)
+    return False
+
+# Función: Comparar los resultados con los de una ejecución anterior (guardada en
+# ruta_anterior), mostrar los cambios y devolver la lista de regresiones
+def comparar(resultados, ruta_anterior, umbral=0.2):
+    with open(ruta_anterior, encoding='utf-8') as archivo:
+        anteriores = aplanar(json.load(archivo)['resultados'])
+    actuales = aplanar(resultados['resultados'])
+    regresiones = []
+    print(f"\nComparación con {ruta_anterior} (umbral {umbral:.0%}):")
+    for clave in sorted(anteriores.keys() & actuales.keys()):
+        anterior, actual = anteriores[clave], actuales[clave]
+        if not clave.endswith(('_us', '_s', 'rps')) or not anterior:
+            continue
+        marca = ''
+        if empeoro(clave, anterior, actual, umbral):
+            marca = '  REGRESIÓN'
+            regresiones.append(clave)
+        print(f"  {clave:<60}{anterior:14.2f} -> {actual:14.2f}  ({actual / anterior - 1:+.1%}){marca}")
+    print(f"{len(regresiones)} regresiones" if regresiones else "Sin regresiones")
+    return regresiones
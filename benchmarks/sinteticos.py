@@ -0,0 +1,94 @@
+# Datasets sintéticos con el esquema del ETL (solo las columnas que sirve la API), para
+# medir los endpoints con distintos tamaños (10k, 100k, 1M filas) sin depender de los
+# datos reales. Con la misma semilla se genera siempre el mismo dataset.
+# Los valores imitan la forma de los datos reales: títulos repetidos, géneros, actores y
+# directores unidos por ', ', pocas películas con muchos votos y actores y directores con
+# muchas películas (distribución sesgada).
+# Uso: python -m benchmarks.sinteticos [filas] [directorio] [semilla]
+import os
+import sys
+import numpy as np
+import pandas as pd
+from carga import RUTA_ARTEFACTO, escribir_artefacto
+
+PALABRAS = ['Amor', 'Noche', 'Ciudad', 'Sombra', 'Guerra', 'Verano', 'Río', 'Fuego', 'Sueño',
+            'Camino', 'Mar', 'Luz', 'Tiempo', 'Corazón', 'Invierno', 'Ángel', 'Lobo', 'Reina',
+            'Último', 'Secreto', 'Viaje', 'Historia', 'Cielo', 'Destino', 'Silencio', 'Jardín',
+            'Hermano', 'Tormenta', 'Estrella', 'Perdido', 'Regreso', 'Misión', 'Frontera']
+GENEROS = ['Action', 'Adventure', 'Animation', 'Comedy', 'Crime', 'Documentary', 'Drama',
+           'Family', 'Fantasy', 'History', 'Horror', 'Music', 'Mystery', 'Romance',
+           'Science Fiction', 'Thriller', 'War', 'Western']
+IDIOMAS = ['en', 'fr', 'es', 'de', 'ja', 'it', 'ko', 'zh']
+NOMBRES = ['Ana', 'José', 'María', 'Tom', 'Emma', 'Lucas', 'Sofía', 'Martín', 'Julia', 'Noah',
+           'Olivia', 'Liam', 'Chloé', 'Hugo', 'Valentina', 'Ethan', 'Zoë', 'Mateo', 'Isabel', 'Max']
+APELLIDOS = ['García', 'Smith', 'Müller', 'Rossi', 'Tanaka', 'Dubois', 'Kim', 'López', 'Brown',
+             'Nguyen', 'Silva', 'Novak', 'Cohen', 'Ivanova', 'Hanks', 'Pérez', "O'Brien", 'Wang']
+
+# Función: Posiciones sesgadas en [0, n): las primeras aparecen mucho más que las últimas
+def sesgadas(rng, n, cantidad):
+    return (n * rng.random(cantidad) ** 3).astype(np.int64)
+
+# Función: Nombres de personas distintos (nombre y apellido, con un número cuando ya se
+# usaron todas las combinaciones)
+def personas(cantidad):
+    combinaciones = len(NOMBRES) * len(APELLIDOS)
+    return [f'{NOMBRES[i % len(NOMBRES)]} {APELLIDOS[i // len(NOMBRES) % len(APELLIDOS)]}'
+            + (f' {i // combinaciones}' if i >= combinaciones else '')
+            for i in range(cantidad)]
+
+# Función: Unir con ', ' una cantidad variable de elementos por fila
+def unir(valores, cantidades, elegir):
+    total = int(cantidades.sum())
+    elegidos = np.asarray(valores, dtype=object)[elegir(total)]
+    fines = np.cumsum(cantidades)
+    return [', '.join(elegidos[fin - cantidad:fin]) for cantidad, fin in zip(cantidades, fines)]
+
+# Función: Generar un dataset sintético de la cantidad de filas indicada
+def generar_dataset(filas, semilla=0):
+    rng = np.random.default_rng(semilla)
+
+    # Títulos de 1 a 4 palabras; los cortos se repiten entre películas, como en los datos reales
+    largos = rng.integers(1, 5, filas)
+    titulos = unir(PALABRAS, largos, lambda total: rng.integers(0, len(PALABRAS), total))
+    titulos = [titulo.replace(', ', ' ') for titulo in titulos]
+    numerados = rng.random(filas) < 0.5
+    titulos = [f'{titulo} {i}' if numerado else titulo for i, (titulo, numerado) in enumerate(zip(titulos, numerados))]
+
+    actores = personas(max(100, filas // 4))
+    directores = personas(max(20, filas // 15))[::-1]
+
+    fechas = pd.Timestamp('1993-01-01') + pd.to_timedelta(rng.integers(0, 25 * 365, filas), unit='D')
+    budget = np.where(rng.random(filas) < 0.3, 0.0, np.round(rng.lognormal(16, 1.2, filas)))
+    revenue = np.where(rng.random(filas) < 0.2, 0.0, np.round(rng.lognormal(16.5, 1.5, filas)))
+    retorno = np.where(budget != 0, np.round(revenue / np.where(budget != 0, budget, 1), 2), 0.0)
+    return pd.DataFrame({
+        'id': np.arange(1, filas + 1, dtype=np.int64),
+        'title': titulos,
+        'genre': unir(GENEROS, rng.integers(1, 4, filas), lambda total: sesgadas(rng, len(GENEROS), total)),
+        'original_language': np.asarray(IDIOMAS)[sesgadas(rng, len(IDIOMAS), filas)],
+        'runtime': np.clip(np.round(rng.normal(105, 20, filas)), 60, 240),
+        'popularity': np.round(rng.lognormal(1.5, 1.0, filas), 6),
+        'vote_count': np.round(rng.lognormal(4.5, 1.8, filas)),
+        'vote_average': np.round(rng.uniform(3, 9, filas), 1),
+        'release_date': fechas,
+        'release_year': fechas.year.to_numpy(dtype=np.int64),
+        'revenue': revenue,
+        'budget': budget,
+        'return': retorno,
+        'actor': unir(actores, rng.integers(1, 7, filas), lambda total: sesgadas(rng, len(actores), total)),
+        'director': np.asarray(directores, dtype=object)[sesgadas(rng, len(directores), filas)],
+    })
+
+# Función: Generar el dataset y guardarlo como artefacto Parquet en el directorio (con el
+# nombre que lee la API). Devuelve la ruta del artefacto
+def generar_directorio(filas, directorio, semilla=0):
+    os.makedirs(directorio, exist_ok=True)
+    ruta = os.path.join(directorio, RUTA_ARTEFACTO)
+    escribir_artefacto(generar_dataset(filas, semilla), ruta)
+    return ruta
+
+if __name__ == '__main__':
+    filas = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    directorio = sys.argv[2] if len(sys.argv) > 2 else f'sintetico_{filas}'
+    semilla = int(sys.argv[3]) if len(sys.argv) > 3 else 0
+    print(f"{filas} filas escritas en {generar_directorio(filas, directorio, semilla)}")
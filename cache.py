@@ -0,0 +1,61 @@
+import threading
+import time
+from collections import OrderedDict
+
+# Caché de respuestas con expulsión LRU (la entrada usada hace más tiempo sale primero
+# cuando se llena) y vencimiento opcional por tiempo (ttl, en segundos).
+# Cada entrada guarda la versión de los datos con la que se calculó: cuando la versión
+# cambia (se recargó el dataset o el modelo) el caché se vacía automáticamente.
+# Cualquier objeto con los métodos obtener/guardar/invalidar/estadisticas puede
+# reemplazarlo
+class CacheRespuestas:
+
+    def __init__(self, max_entradas=1024, ttl=None):
+        self.max_entradas = max_entradas
+        self.ttl = ttl
+        self._entradas = OrderedDict()
+        self._version = None
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+
+    # Devuelve la respuesta guardada para la clave, o None si no está o venció
+    def obtener(self, clave, version=None):
+        with self._lock:
+            if version != self._version:
+                self._entradas.clear()
+                self._version = version
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] is not None and entrada[0] < time.monotonic():
+                del self._entradas[clave]
+                entrada = None
+            if entrada is None:
+                self.fallos += 1
+                return None
+            self._entradas.move_to_end(clave)
+            self.aciertos += 1
+            return entrada[1]
+
+    def guardar(self, clave, valor, version=None):
+        if self.max_entradas <= 0:
+            return
+        expira = None if self.ttl is None else time.monotonic() + self.ttl
+        with self._lock:
+            # No se guardan respuestas calculadas con una versión anterior de los datos
+            if version != self._version:
+                return
+            self._entradas[clave] = (expira, valor)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.max_entradas:
+                self._entradas.popitem(last=False)
+
+    def invalidar(self):
+        with self._lock:
+            self._entradas.clear()
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.aciertos + self.fallos
+            return {'entradas': len(self._entradas), 'max_entradas': self.max_entradas,
+                    'ttl': self.ttl, 'aciertos': self.aciertos, 'fallos': self.fallos,
+                    'tasa_aciertos': self.aciertos / consultas if consultas else 0.0}
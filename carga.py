@@ -0,0 +1,146 @@
+import json
+import os
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+# Rutas del dataset que sirve la API: el artefacto Parquet que genera el ETL y,
+# como respaldo, el CSV original
+RUTA_ARTEFACTO = 'data_preparadaML.parquet'
+RUTA_DATOS = 'data_preparadaML.csv'
+
+# Tipos explícitos de cada columna del dataset del ETL
+ESQUEMA = {
+    'id': pa.int64(), 'title': pa.string(), 'tagline': pa.string(), 'overview': pa.string(),
+    'collection': pa.string(), 'genre': pa.string(), 'company': pa.string(),
+    'original_language': pa.string(), 'runtime': pa.float64(), 'popularity': pa.float64(),
+    'vote_count': pa.float64(), 'vote_average': pa.float64(), 'release_date': pa.timestamp('ns'),
+    'release_year': pa.int64(), 'status': pa.string(), 'country': pa.string(),
+    'language': pa.string(), 'revenue': pa.float64(), 'budget': pa.float64(),
+    'return': pa.float64(), 'actor': pa.string(), 'director': pa.string(),
+}
+
+# Columnas que sirve la API: solo estas se leen del disco (el id permite relacionar las
+# filas con las de una versión anterior del dataset)
+COLUMNAS_SERVICIO = ['id', 'title', 'genre', 'original_language', 'runtime', 'popularity',
+                     'vote_count', 'vote_average', 'release_date', 'release_year',
+                     'return', 'budget', 'revenue', 'actor', 'director']
+
+# Tipos compactos en memoria para las columnas de la API:
+# - textos con pocos valores distintos como categóricas
+# - enteros con el tipo entero más chico que alcanza (nulos con el tipo Int nulable)
+# - popularity, budget, revenue y return en float32 solo si ningún valor cambia al
+#   convertirlo (popularity tiene 6 decimales: en general se queda en float64). return
+#   se compara redondeado a DECIMALES_RETORNO, que es como lo leen los índices: float32
+#   solo conserva los 2 decimales de los retornos menores que unos 2^17
+CATEGORICAS = ['director', 'genre', 'original_language']
+ENTERAS = ['id', 'vote_count', 'release_year', 'runtime']
+FLOTANTES_32_EXACTAS = {'popularity': None, 'budget': None, 'revenue': None, 'return': 2}
+
+# El ETL redondea 'return' a 2 decimales: al pasar la columna (que puede estar en
+# float32) a float64 se vuelve a redondear para recuperar los valores exactos
+DECIMALES_RETORNO = FLOTANTES_32_EXACTAS['return']
+
+# Función: Rutas de los archivos que el ETL escribe junto al artefacto: el estado (hash
+# de cada película en la última ejecución) y el manifiesto de cambios
+def rutas_auxiliares(ruta_artefacto=RUTA_ARTEFACTO):
+    base = os.path.splitext(ruta_artefacto)[0]
+    return base + '.estado.parquet', base + '.cambios.json'
+
+# Función: Leer el manifiesto de cambios de la última ejecución del ETL. Devuelve None si
+# no existe o si es más viejo que el artefacto (el artefacto se generó de otra forma)
+def leer_cambios(ruta_artefacto=RUTA_ARTEFACTO):
+    ruta_cambios = rutas_auxiliares(ruta_artefacto)[1]
+    try:
+        if os.path.getmtime(ruta_cambios) < os.path.getmtime(ruta_artefacto):
+            return None
+        with open(ruta_cambios, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except (OSError, ValueError):
+        return None
+
+# Función: Guardar un DataFrame del ETL como artefacto Parquet con tipos explícitos
+def escribir_artefacto(data, ruta=RUTA_ARTEFACTO):
+    pq.write_table(tabla_artefacto(data), ruta)
+
+# Función: Convertir un DataFrame del ETL a una tabla Arrow con los tipos de ESQUEMA
+def tabla_artefacto(data):
+    columnas = [columna for columna in ESQUEMA if columna in data.columns]
+    data = data[columnas].copy()
+    for columna in columnas:
+        if ESQUEMA[columna] == pa.string():
+            # Los nulos se guardan como nulos de texto (no como el texto 'nan')
+            data[columna] = data[columna].astype(object).where(data[columna].notna(), None)
+        elif columna == 'release_date':
+            data[columna] = pd.to_datetime(data[columna], format='%Y-%m-%d', errors='coerce')
+        else:
+            # Las columnas numéricas pueden llegar como object si el CSV mezcla tipos
+            # (popularity en el dataset original): lo que no es un número queda nulo
+            data[columna] = pd.to_numeric(data[columna], errors='coerce')
+    esquema = pa.schema([(columna, ESQUEMA[columna]) for columna in columnas])
+    return pa.Table.from_pandas(data, schema=esquema, preserve_index=False)
+
+# Función: Cargar el dataset y preparar las columnas derivadas que usan los endpoints.
+# Se lee el artefacto Parquet solo con las columnas pedidas; si no existe, se usa el
+# CSV (o la lista de CSV, que se concatenan en orden). Con compacto=True las columnas
+# se guardan en memoria con los tipos compactos de la API
+def cargar_datos(ruta_artefacto=RUTA_ARTEFACTO, rutas_csv=RUTA_DATOS, columnas=COLUMNAS_SERVICIO, compacto=True):
+    if os.path.exists(ruta_artefacto):
+        data = pd.read_parquet(ruta_artefacto, columns=columnas)
+    else:
+        if isinstance(rutas_csv, str):
+            rutas_csv = [rutas_csv]
+        data = pd.concat([pd.read_csv(ruta, usecols=columnas) for ruta in rutas_csv], ignore_index=True)
+    if compacto:
+        data = compactar(data)
+    return preparar_calendario(data)
+
+# Función: Convertir un número a entero con el tipo más chico posible. Si la columna
+# tiene decimales se deja igual
+def entero_minimo(serie):
+    valores = serie.dropna()
+    if not (valores == np.floor(valores)).all():
+        return serie
+    tipo = pd.to_numeric(valores, downcast='integer').dtype if len(valores) else np.dtype('int8')
+    if serie.isna().any():
+        # Tipo entero nulable de pandas: int16 -> Int16
+        return serie.astype(tipo.name.capitalize())
+    return serie.astype(tipo)
+
+# Función: Aplicar los tipos compactos a las columnas de la API que estén en el DataFrame
+def compactar(data):
+    for columna in CATEGORICAS:
+        if columna in data.columns:
+            data[columna] = data[columna].astype('category')
+    for columna in ENTERAS:
+        if columna in data.columns:
+            data[columna] = entero_minimo(data[columna])
+    for columna, decimales in FLOTANTES_32_EXACTAS.items():
+        if columna in data.columns:
+            compacta = data[columna].astype('float32')
+            original, recuperada = data[columna].astype('float64'), compacta.astype('float64')
+            if decimales is not None:
+                original, recuperada = original.round(decimales), recuperada.round(decimales)
+            if recuperada.equals(original):
+                data[columna] = compacta
+    return data
+
+# Función: Mostrar cuánta memoria ocupa cada columna del DataFrame
+def reportar_memoria(data):
+    memoria = data.memory_usage(deep=True, index=False)
+    print(f"Memoria del dataset ({len(data)} filas):")
+    for columna, bytes_columna in memoria.items():
+        print(f"  {columna:<18} {str(data[columna].dtype):<15} {bytes_columna / 2**20:8.2f} MB")
+    print(f"  {'total':<18} {'':<15} {memoria.sum() / 2**20:8.2f} MB")
+    return memoria
+
+# Función: Convertir release_date a fecha una sola vez y derivar el mes (1-12) y el
+# día de la semana (0 = lunes ... 6 = domingo) como columnas compactas int8.
+# Las fechas inválidas quedan como NaT, con mes 0 y día -1
+def preparar_calendario(data):
+    fechas = pd.to_datetime(data['release_date'], format='%Y-%m-%d', errors='coerce')
+    data['release_date'] = fechas
+    data['mes'] = fechas.dt.month.fillna(0).astype('int8')
+    data['dia_semana'] = fechas.dt.weekday.fillna(-1).astype('int8')
+    return data
@@ -0,0 +1,83 @@
+import asyncio
+import importlib
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+
+# Pool de procesos para los endpoints costosos (recomendación y agregados de actores y
+# directores), así no bloquean el event loop ni compiten por el GIL con los endpoints
+# livianos. Cada proceso importa el módulo de la aplicación al iniciar, de modo que
+# ya tiene el dataset y los índices cargados cuando llega la primera consulta. Los
+# procesos se crean con 'spawn' y no con fork: así cargan la aplicación por su cuenta y
+# no heredan locks tomados por otros hilos (por ejemplo los de las métricas) en el
+# momento de crearlos, lo que los dejaría bloqueados.
+# Como no heredan el estado del proceso principal, lo que tienen que saber de él (por
+# ejemplo la versión de los datos publicada) se les pasa en variables de entorno.
+# Si hay demasiadas consultas esperando (max_cola), se rechazan con 503 en lugar de
+# acumularlas y aumentar la latencia de todas
+# Función: Inicializar un proceso del pool: definir las variables de entorno y después
+# importar el módulo de la aplicación (que las lee al importarse)
+def iniciar_proceso(modulo, entorno):
+    os.environ.update(entorno)
+    importlib.import_module(modulo)
+
+class PoolPesado:
+
+    def __init__(self, modulo, procesos=None, max_cola=None):
+        self.procesos = procesos or os.cpu_count() or 1
+        self.max_cola = max_cola if max_cola is not None else 4 * self.procesos
+        self._modulo = modulo
+        self._executor = None
+        self._pendientes = 0
+        self.rechazadas = 0
+
+    def _crear(self, entorno=None):
+        executor = ProcessPoolExecutor(self.procesos, mp_context=multiprocessing.get_context('spawn'),
+                                       initializer=iniciar_proceso, initargs=(self._modulo, dict(entorno or {})))
+        # Arrancar todos los procesos ahora y no con la primera consulta
+        for futuro in [executor.submit(os.getpid) for _ in range(self.procesos)]:
+            futuro.result()
+        return executor
+
+    @property
+    def activo(self):
+        return self._executor is not None
+
+    # Arranca los procesos con las variables de entorno indicadas (además de las del
+    # proceso principal)
+    def iniciar(self, entorno=None):
+        self._executor = self._crear(entorno)
+
+    # Reemplaza los procesos por otros nuevos, que parten del estado actual de la
+    # aplicación (por ejemplo después de recargar el dataset). Las consultas que ya
+    # estaban en los procesos anteriores terminan allí antes de que se cierren
+    def reiniciar(self, entorno=None):
+        anterior, self._executor = self._executor, self._crear(entorno)
+        if anterior is not None:
+            anterior.shutdown(wait=False)
+
+    def detener(self):
+        if self._executor is not None:
+            self._executor.shutdown(cancel_futures=True)
+            self._executor = None
+
+    # Ejecuta funcion(*args) en un proceso del pool y espera el resultado sin bloquear.
+    # Si el pool no se inició (iniciar() se llama en el ciclo de vida de la aplicación) es
+    # un error: sin él la consulta correría en un hilo, sin cola acotada ni procesos aparte
+    async def ejecutar(self, funcion, *args):
+        if self._executor is None:
+            raise RuntimeError("El pool de procesos no está iniciado (falta ejecutar el ciclo de vida de la aplicación)")
+        if self._pendientes >= self.max_cola:
+            self.rechazadas += 1
+            raise HTTPException(status_code=503, detail="Servidor ocupado, intente nuevamente",
+                                headers={'Retry-After': '1'})
+        self._pendientes += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._executor, funcion, *args)
+        finally:
+            self._pendientes -= 1
+
+    def estadisticas(self):
+        return {'procesos': self.procesos, 'max_cola': self.max_cola,
+                'pendientes': self._pendientes, 'rechazadas': self.rechazadas}
@@ -0,0 +1,285 @@
+import os
+import threading
+import time
+import copy
+import traceback
+from fastapi import HTTPException
+from indices import IndiceTitulos, IndiceTrigramas, IndiceActores, IndiceDirectores, TablasCalendario, calcular_origen
+from recomendador import MotorRecomendacion
+from vecinos import MotorTabla
+from metricas import span
+
+# Error de los endpoints que usan una parte de la instantánea que todavía se está
+# construyendo (ver Instantanea con diferir=True): 503 con Retry-After, igual que cuando
+# el pool de procesos está lleno
+class NoListo(HTTPException):
+
+    def __init__(self, nombre):
+        super().__init__(status_code=503, detail=f"El servicio está iniciando: '{nombre}' todavía no está listo",
+                         headers={'Retry-After': '1'})
+
+# Marcador de una parte de la instantánea que todavía no se construyó: cualquier uso
+# responde NoListo. La versión es 0, como la de un recomendador sin reconstruir
+class Pendiente:
+    version = 0
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+
+    def __getattr__(self, atributo):
+        if atributo.startswith('__'):
+            raise AttributeError(atributo)
+        raise NoListo(self.nombre)
+
+# Partes de la instantánea que se pueden construir después de publicarla (ver diferir)
+SUBSISTEMAS_DIFERIDOS = ('indice_trigramas', 'indice_actores', 'indice_directores', 'motor_recomendacion')
+
+# Instantánea de todo lo que usan los endpoints: el dataset, sus índices y el modelo de
+# recomendación, con un número de versión. Una instantánea no se modifica nunca: una
+# recarga arma otra completa y recién entonces la publica, así cada consulta trabaja
+# de principio a fin sobre la misma versión de los datos.
+# Con diferir=True solo se construyen las tablas de calendario y el índice de títulos
+# (lo que usan los endpoints livianos); el resto queda Pendiente hasta que completar()
+# devuelve otra instantánea con todo construido
+class Instantanea:
+
+    def __init__(self, data, version=1, caracteristicas=None, version_artefacto=None, vecinos=None, diferir=False):
+        self.version = version
+        # Versión del artefacto del ETL del que salieron los datos (ver etl.version_estado)
+        self.version_artefacto = version_artefacto
+        self.data = data
+
+        # Precalcular las tablas de conteo por mes y por día de la semana
+        with span('tablas_calendario'):
+            self.tablas_calendario = TablasCalendario(data['release_date'], data['mes'], data['dia_semana'])
+
+        # Construir el índice de títulos normalizados
+        with span('indice_titulos'):
+            self.indice_titulos = IndiceTitulos(data['title'])
+
+        if diferir:
+            # Se guarda lo necesario para construir el resto en completar()
+            self._diferido = (caracteristicas, vecinos)
+            for nombre in SUBSISTEMAS_DIFERIDOS:
+                setattr(self, nombre, Pendiente(nombre))
+        else:
+            self._construir(caracteristicas, vecinos)
+
+    def _construir(self, caracteristicas, vecinos):
+        data = self.data
+
+        # Construir el índice de trigramas de los títulos para las búsquedas aproximadas
+        with span('indice_trigramas'):
+            self.indice_trigramas = IndiceTrigramas(self.indice_titulos.claves())
+
+        # Construir el índice invertido de actores con sus retornos precalculados
+        with span('indice_actores'):
+            self.indice_actores = IndiceActores(data['actor'], data['return'])
+
+        # Agrupar las películas y el retorno total de cada director
+        with span('indice_directores'):
+            self.indice_directores = IndiceDirectores(data)
+
+        # Usar la tabla de vecinos precalculada si la hay (ver vecinos.py); si no, construir
+        # el modelo de recomendación (matriz de características y ajuste). sklearn solo se
+        # importa en ese caso
+        if vecinos is not None:
+            self.motor_recomendacion = MotorTabla(data, vecinos)
+        else:
+            self.motor_recomendacion = MotorRecomendacion(data, caracteristicas)
+        self._diferido = None
+
+    # Si todavía hay partes pendientes (la instantánea se armó con diferir=True)
+    @property
+    def completa(self):
+        return self._diferido is None
+
+    # Devuelve una instantánea igual (misma versión y mismos datos) con las partes
+    # pendientes construidas. Esta no se modifica: se sigue usando mientras tanto
+    def completar(self):
+        if self.completa:
+            return self
+        completa = copy.copy(self)
+        completa._construir(*self._diferido)
+        return completa
+
+    # Estado de cada parte de la instantánea: True si ya está construida
+    def subsistemas(self):
+        return {'tablas_calendario': True, 'indice_titulos': True,
+                **{nombre: not isinstance(getattr(self, nombre), Pendiente) for nombre in SUBSISTEMAS_DIFERIDOS}}
+
+    # Devuelve la instantánea siguiente para una versión nueva del dataset en la que solo
+    # cambiaron las películas de ids modificados (además de las agregadas y eliminadas).
+    # Los índices y el recomendador se actualizan en lugar de construirse de cero (o se
+    # usa la tabla de vecinos precalculada para el dataset nuevo, si la hay)
+    def actualizar(self, data, modificados, version_artefacto=None, vecinos=None):
+        origen = calcular_origen(self.data['id'], data['id'], modificados)
+        nueva = Instantanea.__new__(Instantanea)
+        nueva.version = self.version + 1
+        nueva.version_artefacto = version_artefacto
+        nueva.data = data
+        nueva._diferido = None
+        with span('tablas_calendario'):
+            nueva.tablas_calendario = TablasCalendario(data['release_date'], data['mes'], data['dia_semana'])
+        with span('actualizar_indice_titulos'):
+            nueva.indice_titulos = self.indice_titulos.actualizar(data['title'], origen)
+        with span('actualizar_indice_trigramas'):
+            nueva.indice_trigramas = self.indice_trigramas.actualizar(nueva.indice_titulos.claves())
+        with span('actualizar_indice_actores'):
+            nueva.indice_actores = self.indice_actores.actualizar(data['actor'], data['return'], origen)
+        with span('actualizar_indice_directores'):
+            nueva.indice_directores = self.indice_directores.actualizar(data, origen)
+        if vecinos is not None:
+            nueva.motor_recomendacion = MotorTabla(data, vecinos)
+        else:
+            with span('actualizar_recomendador'):
+                nueva.motor_recomendacion = self.motor_recomendacion.actualizar(data, origen)
+        return nueva
+
+# Recarga del dataset sin cortar el servicio. cargar(anterior) arma la instantánea nueva
+# a partir de la actual (o de cero si es None); se ejecuta en un hilo aparte y al
+# terminar la instantánea se reemplaza con una sola asignación. Las consultas que ya
+# tomaron la instantánea anterior terminan con ella.
+# La recarga se pide con recargar() o vigilando los archivos de datos (vigilar)
+class Recargador:
+
+    def __init__(self, cargar, rutas=(), al_publicar=None):
+        self._cargar = cargar
+        self._rutas = list(rutas)
+        # Se llama con la instantánea nueva después de publicarla
+        self._al_publicar = al_publicar
+        self._lock = threading.Lock()
+        self._hilo = None
+        self._pendiente = False
+        self._vigilante = None
+        self._detener = threading.Event()
+        self.recargas = 0
+        self.ultima_recarga = None
+        self.duracion_ultima_recarga = None
+        self.ultimo_error = None
+        self._firma = self._firmar()
+        self.instantanea = cargar(None)
+
+    # Fecha de modificación y tamaño de cada archivo vigilado
+    def _firmar(self):
+        firma = []
+        for ruta in self._rutas:
+            try:
+                estado = os.stat(ruta)
+                firma.append((estado.st_mtime_ns, estado.st_size))
+            except OSError:
+                firma.append(None)
+        return tuple(firma)
+
+    @property
+    def recargando(self):
+        return self._hilo is not None
+
+    # Pide una recarga en segundo plano. Si ya hay una en curso, se hace otra al terminar
+    # (así siempre se termina con los datos más recientes)
+    def recargar(self):
+        with self._lock:
+            self._pendiente = True
+            if self._hilo is not None:
+                return self._hilo
+            self._hilo = threading.Thread(target=self._recargar, daemon=True)
+            self._hilo.start()
+            return self._hilo
+
+    def _recargar(self):
+        try:
+            while True:
+                with self._lock:
+                    if not self._pendiente:
+                        self._hilo = None
+                        return
+                    self._pendiente = False
+                self._recargar_una_vez()
+        finally:
+            # Si el hilo termina por un error inesperado no puede quedar registrado como
+            # recarga en curso: las recargas siguientes no se harían nunca
+            with self._lock:
+                if self._hilo is threading.current_thread():
+                    self._hilo = None
+
+    def _recargar_una_vez(self):
+        inicio = time.perf_counter()
+        firma = self._firmar()
+        try:
+            nueva = self._cargar(self.instantanea)
+        except Exception:
+            # Si falla la recarga se sigue sirviendo la instantánea anterior (y no se
+            # vuelve a intentar hasta que los archivos cambien otra vez)
+            self._firma = firma
+            self.ultimo_error = traceback.format_exc(limit=1)
+            return
+        with self._lock:
+            self.instantanea = nueva
+        self._firma = firma
+        self.recargas += 1
+        self.ultima_recarga = time.time()
+        self.duracion_ultima_recarga = time.perf_counter() - inicio
+        self.ultimo_error = None
+        self._publicada(nueva)
+
+    # Avisa que se publicó una instantánea. Un error del aviso (por ejemplo al reiniciar
+    # el pool de procesos) se informa en ultimo_error: la instantánea ya está publicada
+    def _publicada(self, instantanea):
+        if self._al_publicar is None:
+            return
+        try:
+            self._al_publicar(instantanea)
+        except Exception:
+            self.ultimo_error = traceback.format_exc(limit=1)
+
+    # Construye las partes pendientes de la instantánea publicada (ver Instantanea con
+    # diferir=True) y publica la instantánea completa. Si mientras tanto se publicó otra
+    # (una recarga), la completa se descarta: la recarga ya arma una instantánea entera
+    def completar(self):
+        actual = self.instantanea
+        completa = actual.completar()
+        if completa is actual:
+            return False
+        with self._lock:
+            if self.instantanea is not actual:
+                return False
+            self.instantanea = completa
+        self._publicada(completa)
+        return True
+
+    # Revisa los archivos vigilados cada intervalo segundos y pide una recarga cuando
+    # cambian. Se espera a que el cambio se mantenga en dos revisiones seguidas, para no
+    # recargar a mitad de una escritura del ETL (que reemplaza varios archivos)
+    def vigilar(self, intervalo):
+        if self._vigilante is not None or not self._rutas:
+            return
+        self._detener.clear()
+        self._vigilante = threading.Thread(target=self._vigilar, args=(intervalo,), daemon=True)
+        self._vigilante.start()
+
+    def _vigilar(self, intervalo):
+        vista = None
+        while not self._detener.wait(intervalo):
+            firma = self._firmar()
+            if firma == self._firma or self.recargando:
+                vista = None
+            elif firma != vista:
+                vista = firma
+            else:
+                vista = None
+                self.recargar()
+
+    def detener(self):
+        self._detener.set()
+        if self._vigilante is not None:
+            self._vigilante.join()
+            self._vigilante = None
+
+    def estadisticas(self):
+        return {'version': self.instantanea.version,
+                'version_artefacto': self.instantanea.version_artefacto,
+                'recargando': self.recargando,
+                'recargas': self.recargas,
+                'ultima_recarga': self.ultima_recarga,
+                'duracion_ultima_recarga': self.duracion_ultima_recarga,
+                'ultimo_error': self.ultimo_error}
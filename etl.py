@@ -0,0 +1,330 @@
+# Pipeline ETL por bloques: las mismas transformaciones del notebook PI_Ruth_1_ETL.ipynb,
+# pero leyendo movies_dataset.csv y credits.csv de a bloques de filas (chunksize) y
+# escribiendo el dataset de la API (data_preparadaML) a medida que se procesa cada bloque.
+# Así la memoria queda acotada por el tamaño del bloque y no por el tamaño de los archivos:
+# de credits solo se guardan los nombres ya extraídos (id, actor, director), nunca las
+# columnas cast y crew completas.
+#
+# Cada ejecución guarda además un hash del contenido de cada película (de su fila de movies
+# y de su fila de credits). Con --incremental solo se procesan las películas nuevas o
+# cambiadas y se actualiza el artefacto existente; también se escribe un manifiesto con los
+# ids agregados, modificados y eliminados. Si se cambian las transformaciones de este archivo
+# hay que volver a ejecutar el ETL completo.
+#
+# Con el artefacto nuevo se calcula además la tabla de vecinos del recomendador de la API
+# (ver vecinos.py); también en las ejecuciones incrementales, donde se recalcula completa
+# (una película cambiada puede cambiar los vecinos de cualquier otra).
+#
+# Uso:
+#   python etl.py
+#   python etl.py --incremental                               (solo películas nuevas o cambiadas)
+#   python etl.py --verificar ruta/al/data_preparadaML.csv   (compara con la salida del notebook)
+#   python etl.py --workers 4                                 (procesos para parsear credits)
+#   python etl.py --sin-vecinos                               (sin la tabla de vecinos)
+import argparse
+import json
+import os
+import re
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from carga import ESQUEMA, RUTA_ARTEFACTO, RUTA_DATOS, cargar_datos, escribir_artefacto, rutas_auxiliares, tabla_artefacto
+from vecinos import escribir_vecinos
+
+# Archivos de entrada (los originales de Kaggle)
+RUTA_PELICULAS = 'PI_RuthCastañeda/datos/movies_dataset.csv'
+RUTA_CREDITOS = 'PI_RuthCastañeda/datos/credits.csv'
+FILAS_POR_BLOQUE = 5000
+
+# Patrones de extracción de los campos anidados (compilados una sola vez)
+PATRON_NOMBRE = re.compile(r"'name':\s+'(.*?)'")
+PATRON_DIRECTOR = re.compile(r"'job': 'Director', 'name':\s+'(.*?)'")
+
+# Columnas anidadas de movies -> columna desanidada
+COLUMNAS_ANIDADAS = {
+    'belongs_to_collection': 'collection', 'genres': 'genre', 'production_companies': 'company',
+    'production_countries': 'country', 'spoken_languages': 'language',
+}
+COLUMNAS_DESCARTADAS = ['video', 'imdb_id', 'adult', 'original_title', 'poster_path', 'homepage']
+COLUMNAS_NUMERICAS = ['runtime', 'popularity', 'vote_count', 'vote_average', 'revenue', 'budget']
+
+# Columnas del dataset final, en el orden del notebook
+COLUMNAS_SALIDA = list(ESQUEMA)
+
+# Función: Hash del contenido de cada fila (un entero de 64 bits por fila)
+def hash_filas(data):
+    return pd.util.hash_pandas_object(data, index=False, categorize=False).to_numpy()
+
+# Función: Indicar qué ids son nuevos o tienen un hash distinto al de la ejecución anterior
+def hashes_distintos(anteriores, ids, hashes):
+    return ~np.isin(ids, anteriores.index) | (anteriores.reindex(ids, fill_value=0).to_numpy() != hashes)
+
+# Función: Quitar del bloque los ids que ya aparecieron en bloques anteriores y los
+# repetidos dentro del bloque. Se conserva la primera aparición, como drop_duplicates
+def quitar_repetidos(bloque, vistos):
+    bloque = bloque[~bloque['id'].isin(vistos)].drop_duplicates(subset='id')
+    vistos.update(bloque['id'])
+    return bloque
+
+# Función: Extraer con el patrón los nombres de un campo anidado y unirlos con comas
+def extraer_nombres(patron, texto):
+    return ', '.join(patron.findall(texto))
+
+# Función: Extraer actores y directores de un bloque de credits. Se ejecuta en los
+# procesos del pool, por eso recibe y devuelve solo listas (rápidas de serializar)
+def parsear_creditos(ids, cast, crew):
+    actores = [extraer_nombres(PATRON_NOMBRE, str(x)) for x in cast]
+    directores = [extraer_nombres(PATRON_DIRECTOR, str(x)) for x in crew]
+    return pd.DataFrame({'id': ids, 'actor': actores, 'director': directores})
+
+# Función: Recorrer credits.csv por bloques, sin ids repetidos y con el hash de cada fila
+def bloques_creditos(ruta, filas_por_bloque):
+    vistos = set()
+    for bloque in pd.read_csv(ruta, chunksize=filas_por_bloque):
+        bloque = quitar_repetidos(bloque, vistos)
+        yield bloque.assign(hash=hash_filas(bloque[['cast', 'crew']]))
+
+# Función: Leer credits.csv por bloques y quedarse solo con id, actor y director.
+# Devuelve esos créditos y el hash de la fila original de cada id. Con seleccionar (una
+# función que recibe el bloque y devuelve una máscara) solo se parsean algunas filas.
+# Con procesos > 1 los bloques se parsean en paralelo en un ProcessPoolExecutor:
+# hay como máximo 2 bloques por proceso en vuelo (la memoria sigue acotada) y los
+# resultados se juntan en el orden del archivo
+def leer_creditos(ruta=RUTA_CREDITOS, filas_por_bloque=FILAS_POR_BLOQUE, procesos=None, seleccionar=None):
+    procesos = procesos or os.cpu_count() or 1
+    partes = []
+    hashes = []
+    with ProcessPoolExecutor(procesos) if procesos > 1 else nullcontext() as executor:
+        en_vuelo = deque()
+        for bloque in bloques_creditos(ruta, filas_por_bloque):
+            hashes.append(bloque.set_index('id')['hash'])
+            if seleccionar is not None:
+                bloque = bloque[seleccionar(bloque)]
+            argumentos = (bloque['id'].tolist(), bloque['cast'].tolist(), bloque['crew'].tolist())
+            if executor is None:
+                partes.append(parsear_creditos(*argumentos))
+                continue
+            en_vuelo.append(executor.submit(parsear_creditos, *argumentos))
+            if len(en_vuelo) >= 2 * procesos:
+                partes.append(en_vuelo.popleft().result())
+        partes.extend(futuro.result() for futuro in en_vuelo)
+    return pd.concat(partes, ignore_index=True), pd.concat(hashes)
+
+# Función: Quitar las filas de movies que descarta el notebook (sin fecha de estreno o
+# con 'adult' que no es estrictamente booleano, como las filas corridas) y pasar el id
+# a entero. El bloque se lee todo como texto: así 'adult' se compara con 'True'/'False'
+# igual que en el notebook aunque el bloque no tenga filas corruptas
+def filtrar_peliculas(bloque):
+    bloque = bloque.dropna(subset=['release_date'])
+    bloque = bloque[bloque['adult'].isin(['True', 'False'])].copy()
+    bloque['id'] = bloque['id'].astype('int64')
+    return bloque
+
+# Función: Recorrer movies por bloques ya filtrados y sin ids repetidos, junto con el
+# hash de la fila de cada película
+def bloques_peliculas(ruta, filas_por_bloque):
+    vistos = set()
+    for bloque in pd.read_csv(ruta, dtype=str, chunksize=filas_por_bloque):
+        bloque = quitar_repetidos(filtrar_peliculas(bloque), vistos)
+        yield bloque, hash_filas(bloque)
+
+# Función: Aplicar a un bloque ya filtrado de movies las transformaciones del notebook
+def transformar_peliculas(bloque):
+    for anidada, columna in COLUMNAS_ANIDADAS.items():
+        bloque[columna] = bloque[anidada].map(lambda x: extraer_nombres(PATRON_NOMBRE, str(x)))
+    bloque = bloque.drop(columns=list(COLUMNAS_ANIDADAS))
+
+    bloque['release_date'] = pd.to_datetime(bloque['release_date'], format='%Y-%m-%d', errors='coerce')
+    bloque['release_year'] = bloque['release_date'].dt.year.fillna(0).astype(int)
+
+    bloque[['revenue', 'budget']] = bloque[['revenue', 'budget']].fillna(0)
+    for columna in COLUMNAS_NUMERICAS:
+        bloque[columna] = bloque[columna].astype(float)
+    bloque['return'] = np.where(bloque['budget'] != 0, (bloque['revenue'] / bloque['budget']).round(2), 0)
+
+    return bloque.drop(columns=COLUMNAS_DESCARTADAS)
+
+# Función: Quedarse con las películas del dataset reducido que sirve la API:
+# estrenadas desde 1993, de Estados Unidos y en inglés
+def filtrar_servicio(data):
+    return data[(data['release_year'] > 1992) & (data['country'] == 'United States of America')
+                & (data['language'] == 'English')]
+
+# Función: Transformar películas ya filtradas, unirlas con sus créditos y dejar solo las
+# del dataset de la API
+def preparar_servicio(bloque, creditos):
+    bloque = transformar_peliculas(bloque).merge(creditos, on='id', how='left')
+    return filtrar_servicio(bloque[COLUMNAS_SALIDA])
+
+# Función: Versión de un estado: un hash de todos sus ids y hashes. El manifiesto indica
+# la versión del artefacto y la de la ejecución anterior, así la API puede saber si los
+# cambios se aplican sobre los datos que tiene cargados
+def version_estado(estado):
+    return format(int(np.add.reduce(hash_filas(estado), dtype=np.uint64)), '016x')
+
+# Función: Guardar el estado (id y hashes de cada película) y el manifiesto de cambios
+def escribir_estado(estado, cambios, ruta_parquet):
+    ruta_estado, ruta_cambios = rutas_auxiliares(ruta_parquet)
+    estado.to_parquet(ruta_estado + '.tmp', index=False)
+    os.replace(ruta_estado + '.tmp', ruta_estado)
+    with open(ruta_cambios + '.tmp', 'w', encoding='utf-8') as archivo:
+        json.dump(cambios, archivo)
+    os.replace(ruta_cambios + '.tmp', ruta_cambios)
+
+# Función: Calcular la tabla de vecinos del recomendador de la API para el artefacto nuevo
+# (todavía con el nombre temporal). El artefacto se carga igual que en la API, así la tabla
+# corresponde a lo que carga la API. Se escribe antes de reemplazar el artefacto: cuando la
+# API ve el artefacto y el manifiesto nuevos, la tabla ya está
+def escribir_vecinos_api(ruta_temporal, ruta_parquet, procesos=None):
+    escribir_vecinos(cargar_datos(ruta_temporal), ruta_parquet, procesos=procesos)
+
+# Función: Ejecutar el ETL completo y escribir el CSV y el artefacto Parquet de la API.
+# Cada bloque se agrega al CSV y se escribe como un grupo de filas del Parquet; los dos
+# archivos se escriben con otro nombre y se renombran al final, así la API nunca lee un
+# archivo a medio escribir. Con vecinos=True calcula además la tabla de vecinos.
+# Devuelve la cantidad de películas escritas
+def ejecutar_etl(ruta_peliculas=RUTA_PELICULAS, ruta_creditos=RUTA_CREDITOS, ruta_csv=RUTA_DATOS,
+                 ruta_parquet=RUTA_ARTEFACTO, filas_por_bloque=FILAS_POR_BLOQUE, procesos=None, vecinos=True):
+    creditos, hashes_credito = leer_creditos(ruta_creditos, filas_por_bloque, procesos)
+
+    esquema = pa.schema([(columna, ESQUEMA[columna]) for columna in COLUMNAS_SALIDA])
+    estado = []
+    escritas = 0
+    with open(ruta_csv + '.tmp', 'w', encoding='utf-8', newline='') as archivo_csv, \
+            pq.ParquetWriter(ruta_parquet + '.tmp', esquema) as archivo_parquet:
+        for numero, (bloque, hashes) in enumerate(bloques_peliculas(ruta_peliculas, filas_por_bloque)):
+            estado.append(pd.DataFrame({'id': bloque['id'].to_numpy(), 'hash_pelicula': hashes}))
+            bloque = preparar_servicio(bloque, creditos)
+            bloque.to_csv(archivo_csv, index=False, header=numero == 0)
+            if len(bloque):
+                archivo_parquet.write_table(tabla_artefacto(bloque))
+            escritas += len(bloque)
+    if vecinos:
+        escribir_vecinos_api(ruta_parquet + '.tmp', ruta_parquet, procesos)
+    os.replace(ruta_csv + '.tmp', ruta_csv)
+    os.replace(ruta_parquet + '.tmp', ruta_parquet)
+    estado = pd.concat(estado, ignore_index=True)
+    estado['hash_creditos'] = hashes_credito.reindex(estado['id'], fill_value=0).to_numpy()
+    escribir_estado(estado, {'incremental': False, 'version': version_estado(estado)}, ruta_parquet)
+    return escritas
+
+# Función: Ejecutar el ETL solo sobre las películas nuevas o cambiadas desde la última
+# ejecución y actualizar el artefacto existente. Solo se transforman las películas cuya
+# fila de movies cambió y solo se parsean los créditos de esas películas y de las que
+# cambiaron de créditos (a estas solo se les reemplazan actor y director); las demás filas
+# se toman del artefacto anterior. El resultado (y su orden) es el mismo que el del ETL
+# completo. Si no hay estado anterior se ejecuta el ETL completo.
+# Devuelve el manifiesto de cambios (ids agregados, modificados y eliminados del dataset)
+def ejecutar_etl_incremental(ruta_peliculas=RUTA_PELICULAS, ruta_creditos=RUTA_CREDITOS, ruta_csv=RUTA_DATOS,
+                             ruta_parquet=RUTA_ARTEFACTO, filas_por_bloque=FILAS_POR_BLOQUE, procesos=None,
+                             vecinos=True):
+    ruta_estado, _ = rutas_auxiliares(ruta_parquet)
+    if not (os.path.exists(ruta_estado) and os.path.exists(ruta_parquet)):
+        ejecutar_etl(ruta_peliculas, ruta_creditos, ruta_csv, ruta_parquet, filas_por_bloque, procesos, vecinos)
+        return {'incremental': False}
+    anterior = pd.read_parquet(ruta_estado)
+    version_anterior = version_estado(anterior)
+    anterior = anterior.set_index('id')
+
+    # Películas nuevas o con la fila de movies cambiada
+    estado = []
+    cambiadas = []
+    for bloque, hashes in bloques_peliculas(ruta_peliculas, filas_por_bloque):
+        ids = bloque['id'].to_numpy()
+        estado.append(pd.DataFrame({'id': ids, 'hash_pelicula': hashes}))
+        cambiadas.append(bloque[hashes_distintos(anterior['hash_pelicula'], ids, hashes)])
+    estado = pd.concat(estado, ignore_index=True)
+    cambiadas = pd.concat(cambiadas)
+    ids_actuales, ids_cambiados = set(estado['id']), set(cambiadas['id'])
+
+    # Créditos: se parsean los de las películas cambiadas y los que cambiaron
+    def seleccionar(bloque):
+        ids = bloque['id'].to_numpy()
+        distintos = hashes_distintos(anterior['hash_creditos'], ids, bloque['hash'].to_numpy())
+        return bloque['id'].isin(ids_actuales) & (distintos | bloque['id'].isin(ids_cambiados))
+
+    creditos, hashes_credito = leer_creditos(ruta_creditos, filas_por_bloque, procesos, seleccionar)
+    estado['hash_creditos'] = hashes_credito.reindex(estado['id'], fill_value=0).to_numpy()
+    distintos = hashes_distintos(anterior['hash_creditos'], estado['id'].to_numpy(), estado['hash_creditos'].to_numpy())
+    ids_creditos = set(estado['id'][distintos]) - ids_cambiados
+
+    # Combinar las filas que se conservan, las que cambiaron de créditos y las
+    # películas cambiadas, en el orden en que aparecen en movies
+    previas = pd.read_parquet(ruta_parquet)
+    conservadas = previas[previas['id'].isin(ids_actuales) & ~previas['id'].isin(ids_cambiados)]
+    solo_creditos = conservadas['id'].isin(ids_creditos)
+    data = pd.concat([
+        conservadas[~solo_creditos],
+        conservadas[solo_creditos].drop(columns=['actor', 'director']).merge(creditos, on='id', how='left')[COLUMNAS_SALIDA],
+        preparar_servicio(cambiadas, creditos),
+    ], ignore_index=True)
+    posiciones = pd.Series(np.arange(len(estado)), index=estado['id'])
+    data = data.iloc[np.argsort(posiciones[data['id']].to_numpy(), kind='stable')]
+
+    data.to_csv(ruta_csv + '.tmp', index=False)
+    escribir_artefacto(data, ruta_parquet + '.tmp')
+    if vecinos:
+        escribir_vecinos_api(ruta_parquet + '.tmp', ruta_parquet, procesos)
+    os.replace(ruta_csv + '.tmp', ruta_csv)
+    os.replace(ruta_parquet + '.tmp', ruta_parquet)
+
+    ids_previos, ids_nuevos = set(previas['id']), set(data['id'])
+    cambios = {
+        'incremental': True,
+        'version': version_estado(estado),
+        'version_anterior': version_anterior,
+        'agregadas': sorted(int(i) for i in ids_nuevos - ids_previos),
+        'modificadas': sorted(int(i) for i in ids_nuevos & ids_previos & (ids_cambiados | ids_creditos)),
+        'eliminadas': sorted(int(i) for i in ids_previos - ids_nuevos),
+    }
+    escribir_estado(estado, cambios, ruta_parquet)
+    return cambios
+
+# Función: Comparar el CSV generado con el data_preparadaML del notebook, leyendo ambos
+# como lo hace la API. Devuelve None si coinciden o el texto con las diferencias
+def verificar(ruta_csv, ruta_referencia):
+    try:
+        pd.testing.assert_frame_equal(pd.read_csv(ruta_csv), pd.read_csv(ruta_referencia))
+    except AssertionError as error:
+        return str(error)
+    return None
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="ETL por bloques del dataset de películas")
+    parser.add_argument('--peliculas', default=RUTA_PELICULAS)
+    parser.add_argument('--creditos', default=RUTA_CREDITOS)
+    parser.add_argument('--csv', default=RUTA_DATOS)
+    parser.add_argument('--parquet', default=RUTA_ARTEFACTO)
+    parser.add_argument('--filas-por-bloque', type=int, default=FILAS_POR_BLOQUE)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="procesos para parsear credits (por defecto, todos los núcleos)")
+    parser.add_argument('--incremental', action='store_true',
+                        help="procesar solo las películas nuevas o cambiadas desde la última ejecución")
+    parser.add_argument('--sin-vecinos', action='store_true',
+                        help="no calcular la tabla de vecinos del recomendador")
+    parser.add_argument('--verificar', metavar='CSV_NOTEBOOK',
+                        help="data_preparadaML.csv generado por el notebook para comparar")
+    args = parser.parse_args()
+
+    if args.incremental:
+        cambios = ejecutar_etl_incremental(args.peliculas, args.creditos, args.csv, args.parquet,
+                                           args.filas_por_bloque, args.workers, not args.sin_vecinos)
+        if cambios['incremental']:
+            print(f"{len(cambios['agregadas'])} películas agregadas, {len(cambios['modificadas'])} modificadas "
+                  f"y {len(cambios['eliminadas'])} eliminadas en {args.csv} y {args.parquet}")
+        else:
+            print(f"Sin estado anterior: se ejecutó el ETL completo en {args.csv} y {args.parquet}")
+    else:
+        escritas = ejecutar_etl(args.peliculas, args.creditos, args.csv, args.parquet,
+                                args.filas_por_bloque, args.workers, not args.sin_vecinos)
+        print(f"{escritas} películas escritas en {args.csv} y {args.parquet}")
+    if args.verificar:
+        diferencias = verificar(args.csv, args.verificar)
+        if diferencias:
+            sys.exit(f"La salida no coincide con {args.verificar}:\n{diferencias}")
+        print(f"La salida coincide con {args.verificar}")
@@ -0,0 +1,463 @@
+import bisect
+import itertools
+import unicodedata
+import numpy as np
+import pandas as pd
+from carga import DECIMALES_RETORNO
+from serializacion import Fragmento, a_json
+
+# Función: Normalizar un texto para las búsquedas (minúsculas, sin tildes y sin
+# espacios repetidos), de forma que 'Amélie ' y 'amelie' den la misma clave
+def normalizar_texto(texto):
+    texto = unicodedata.normalize('NFKD', str(texto).lower())
+    texto = ''.join(c for c in texto if not unicodedata.combining(c))
+    return ' '.join(texto.split())
+
+# Función: Relacionar las filas de una versión nueva del dataset con las de la anterior
+# por el id de la película. Devuelve, para cada fila nueva, la posición de la misma
+# película en el dataset anterior, o -1 si es nueva o cambió (ids en modificados)
+def calcular_origen(ids_anteriores, ids_nuevos, modificados=()):
+    origen = pd.Index(ids_anteriores).get_indexer(ids_nuevos)
+    origen[np.isin(ids_nuevos, list(modificados))] = -1
+    return origen
+
+# Función: Inversa de calcular_origen: para cada fila anterior, su posición en el dataset
+# nuevo, o -1 si la película se eliminó o cambió
+def calcular_destino(origen, filas_anteriores):
+    destino = np.full(filas_anteriores, -1)
+    conservadas = np.flatnonzero(origen >= 0)
+    destino[origen[conservadas]] = conservadas
+    return destino
+
+# Índice de títulos: diccionario de título normalizado -> posiciones de fila.
+# Se construye una sola vez al cargar el dataset y resuelve cada búsqueda en O(1).
+# Regla para títulos repetidos: se guardan todas las posiciones en el orden del
+# dataset y la búsqueda devuelve la primera, igual que el antiguo iloc[0]
+class IndiceTitulos:
+
+    def __init__(self, titulos):
+        self._filas = len(titulos)
+        self._posiciones = {}
+        for posicion, titulo in enumerate(titulos):
+            if isinstance(titulo, str):
+                self._posiciones.setdefault(normalizar_texto(titulo), []).append(posicion)
+
+    def __len__(self):
+        return len(self._posiciones)
+
+    # Devuelve un índice nuevo para una versión actualizada del dataset (origen se obtiene
+    # con calcular_origen): las posiciones de las filas que no cambiaron se trasladan y
+    # solo se normalizan los títulos de las filas nuevas o modificadas
+    def actualizar(self, titulos, origen):
+        destino = calcular_destino(origen, self._filas).tolist()
+        indice = IndiceTitulos([])
+        indice._filas = len(titulos)
+        for clave, posiciones in self._posiciones.items():
+            trasladadas = [destino[posicion] for posicion in posiciones if destino[posicion] >= 0]
+            if trasladadas:
+                indice._posiciones[clave] = trasladadas
+        for posicion in np.flatnonzero(origen < 0).tolist():
+            titulo = titulos.iat[posicion]
+            if isinstance(titulo, str):
+                indice._posiciones.setdefault(normalizar_texto(titulo), []).append(posicion)
+        # Las posiciones de cada título quedan en el orden del dataset
+        for posiciones in indice._posiciones.values():
+            posiciones.sort()
+        return indice
+
+    # Devuelve la posición de la película con ese título, o None si no existe
+    def buscar(self, titulo):
+        posiciones = self._posiciones.get(normalizar_texto(titulo))
+        return posiciones[0] if posiciones else None
+
+    # Devuelve todas las posiciones de las películas con ese título
+    def posiciones(self, titulo):
+        return list(self._posiciones.get(normalizar_texto(titulo), []))
+
+    # Devuelve los títulos normalizados distintos, en el orden del dataset
+    def claves(self):
+        return list(self._posiciones)
+
+# Función: Trigramas de una palabra, completada con dos espacios adelante y uno atrás
+# (como pg_trgm), así el comienzo de la palabra pesa más
+def trigramas_palabra(palabra):
+    palabra = f'  {palabra} '
+    return {palabra[i:i + 3] for i in range(len(palabra) - 2)}
+
+# Función: Trigramas de un texto ya normalizado (la unión de los de sus palabras: el
+# orden de las palabras no importa)
+def trigramas(texto):
+    resultado = set()
+    for palabra in texto.split():
+        resultado |= trigramas_palabra(palabra)
+    return resultado
+
+# Índice de trigramas de los títulos para búsquedas aproximadas (con errores de tipeo).
+# Índice invertido trigrama -> títulos que lo contienen, guardado como dos arrays: los
+# títulos de cada trigrama uno detrás de otro y dónde empieza cada trigrama. Una búsqueda
+# solo cuenta los trigramas en común con los títulos que comparten alguno (np.bincount
+# sobre esas listas) y ordena por similitud (trigramas en común / trigramas de ambos),
+# sin comparar la consulta con todo el catálogo
+class IndiceTrigramas:
+
+    def __init__(self, claves):
+        self._ids = {}
+        self._claves = []
+        self._armar(np.zeros(0, dtype=np.int32), np.zeros(0, dtype=np.int32), claves)
+
+    def __len__(self):
+        return len(self._claves)
+
+    # Agrega las claves nuevas a los pares (trigrama, clave) existentes y arma el índice.
+    # Los títulos repiten muchas palabras: los trigramas se calculan una vez por palabra
+    # distinta y se expanden a pares (trigrama, clave) con numpy
+    def _armar(self, pares_trigramas, pares_claves, nuevas):
+        palabras = pd.Series(list(nuevas), dtype=object).str.split().explode()
+        codigos, distintas = pd.factorize(palabras)
+        claves_palabras = palabras.index.to_numpy(dtype=np.int64)[codigos >= 0] + len(self._claves)
+        codigos = codigos[codigos >= 0]
+
+        por_palabra = [trigramas_palabra(palabra) for palabra in distintas]
+        ids = np.array([self._ids.setdefault(trigrama, len(self._ids)) for grupo in por_palabra for trigrama in grupo],
+                       dtype=np.int64)
+        cantidades = np.fromiter(map(len, por_palabra), dtype=np.int64, count=len(por_palabra))
+        inicios = np.cumsum(cantidades) - cantidades
+        repeticiones = cantidades[codigos]
+        desplazamientos = np.arange(repeticiones.sum()) - np.repeat(np.cumsum(repeticiones) - repeticiones, repeticiones)
+        trigramas_nuevos = ids[np.repeat(inicios[codigos], repeticiones) + desplazamientos]
+        claves_nuevas = np.repeat(claves_palabras, repeticiones)
+        self._claves = self._claves + list(nuevas)
+
+        # Un solo código por par ordena por trigrama (y por clave) y quita los pares
+        # repetidos (un trigrama en dos palabras del mismo título)
+        total = max(len(self._claves), 1)
+        codigos = np.unique(np.concatenate([pares_trigramas.astype(np.int64) * total + pares_claves,
+                                            trigramas_nuevos * total + claves_nuevas]))
+        self._pares_claves = (codigos % total).astype(np.int32)
+        self._inicios = np.searchsorted(codigos // total, np.arange(len(self._ids) + 1))
+        self._cantidades = np.bincount(self._pares_claves, minlength=len(self._claves)).astype(np.int32)
+        # Claves ordenadas para las búsquedas por prefijo (autocompletar)
+        self._ordenadas = sorted(self._claves)
+
+    # Devuelve un índice nuevo para otro conjunto de títulos (por ejemplo los de una
+    # versión actualizada del dataset): se conservan los trigramas de los títulos que
+    # siguen y solo se calculan los de los títulos nuevos
+    def actualizar(self, claves):
+        actuales = set(claves)
+        conservar = np.array([clave in actuales for clave in self._claves], dtype=bool)
+        anteriores = set(self._claves)
+        nuevas = [clave for clave in claves if clave not in anteriores]
+        if conservar.all() and not nuevas:
+            return self
+
+        # Número nuevo de cada clave que se conserva (-1 si se quita)
+        numeros = np.where(conservar, np.cumsum(conservar) - 1, -1).astype(np.int32)
+        pares_claves = numeros[self._pares_claves]
+        pares_trigramas = np.repeat(np.arange(len(self._ids), dtype=np.int32), np.diff(self._inicios))
+        quedan = pares_claves >= 0
+
+        indice = IndiceTrigramas.__new__(IndiceTrigramas)
+        indice._ids = dict(self._ids)
+        indice._claves = [clave for clave, conservada in zip(self._claves, conservar) if conservada]
+        indice._armar(pares_trigramas[quedan], pares_claves[quedan], nuevas)
+        return indice
+
+    # Similitud entre dos textos normalizados: trigramas en común / trigramas de ambos
+    @staticmethod
+    def similitud(a, b):
+        trigramas_a, trigramas_b = trigramas(a), trigramas(b)
+        union = len(trigramas_a | trigramas_b)
+        return len(trigramas_a & trigramas_b) / union if union else 0.0
+
+    # Devuelve hasta limite pares (título normalizado, similitud) con similitud de al
+    # menos umbral, de mayor a menor similitud (ante empates, el título más corto y
+    # después el alfabético)
+    def parecidos(self, texto, limite=5, umbral=0.3):
+        consulta = normalizar_texto(texto)
+        trigramas_consulta = trigramas(consulta)
+        ids = [self._ids[trigrama] for trigrama in trigramas_consulta if trigrama in self._ids]
+        if not ids:
+            return []
+        listas = [self._pares_claves[self._inicios[i]:self._inicios[i + 1]] for i in ids]
+        compartidos = np.bincount(np.concatenate(listas), minlength=len(self._claves))
+
+        # Como un título tiene al menos los trigramas que comparte, la similitud no puede
+        # superar compartidos / trigramas de la consulta: se descartan los que no llegan
+        candidatos = np.flatnonzero(compartidos >= max(1, np.ceil(umbral * len(trigramas_consulta))))
+        compartidos = compartidos[candidatos]
+        similitudes = compartidos / (len(trigramas_consulta) + self._cantidades[candidatos] - compartidos)
+        elegidos = similitudes >= umbral
+        candidatos, similitudes = candidatos[elegidos], similitudes[elegidos]
+        if len(candidatos) > limite:
+            # Quedarse con los limite mejores (y los empatados con el último) antes de ordenar
+            corte = np.partition(similitudes, -limite)[-limite]
+            elegidos = similitudes >= corte
+            candidatos, similitudes = candidatos[elegidos], similitudes[elegidos]
+        resultados = sorted(((self._claves[numero], float(similitud)) for numero, similitud in zip(candidatos, similitudes)),
+                            key=lambda par: (-par[1], len(par[0]), par[0]))
+        return resultados[:limite]
+
+    # Sugerencias para autocompletar: primero los títulos que empiezan con el texto (en
+    # orden alfabético) y después los más parecidos. Devuelve hasta limite tuplas
+    # (título normalizado, similitud, 'prefijo' o 'aproximada')
+    def sugerir(self, texto, limite=10, umbral=0.3):
+        consulta = normalizar_texto(texto)
+        if not consulta:
+            return []
+        sugerencias = []
+        inicio = bisect.bisect_left(self._ordenadas, consulta)
+        for clave in self._ordenadas[inicio:inicio + limite]:
+            if not clave.startswith(consulta):
+                break
+            sugerencias.append((clave, self.similitud(consulta, clave), 'prefijo'))
+        if len(sugerencias) < limite:
+            vistas = {clave for clave, _, _ in sugerencias}
+            parecidos = self.parecidos(consulta, limite + len(vistas), umbral)
+            sugerencias += [(clave, similitud, 'aproximada') for clave, similitud in parecidos if clave not in vistas]
+        return sugerencias[:limite]
+
+# Función: Obtener los valores de una columna numérica como float64, redondeados a
+# los decimales indicados
+def valores_float64(serie, decimales=None):
+    valores = serie.to_numpy(dtype='float64', na_value=np.nan)
+    return valores if decimales is None else np.round(valores, decimales)
+
+# Modos de búsqueda de nombres: exacto, por prefijo o por subcadena
+MODOS_BUSQUEDA = ('exacto', 'prefijo', 'contiene')
+
+# Índice invertido de actores: nombre normalizado -> posiciones de sus películas.
+# Se construye separando la columna 'actor' (nombres unidos por comas en el ETL) y
+# guarda por actor la cantidad de películas y la suma y el promedio del retorno,
+# así la consulta exacta se responde en tiempo constante
+class IndiceActores:
+
+    def __init__(self, actores, retornos):
+        self._armar(*self._pares(actores, np.arange(len(actores))), valores_float64(retornos, DECIMALES_RETORNO))
+
+    # Una fila por cada par (actor, película): nombres normalizados y posiciones
+    @staticmethod
+    def _pares(actores, posiciones):
+        nombres = pd.Series(actores.to_numpy(), index=posiciones)
+        nombres = nombres.dropna().astype(str).str.split(',').explode().str.strip()
+        nombres = nombres[nombres != '']
+        normalizados = {nombre: normalizar_texto(nombre) for nombre in nombres.unique()}
+        return nombres.map(normalizados).to_numpy(dtype=object), nombres.index.to_numpy(dtype=np.int64)
+
+    # Arma las estructuras del índice a partir de los pares (actor, película)
+    def _armar(self, nombres, posiciones, retornos):
+        self._retornos = retornos
+        tabla = pd.DataFrame({'nombre': nombres, 'posicion': posiciones})
+        tabla = tabla.drop_duplicates().sort_values(['nombre', 'posicion'], ignore_index=True)
+        tabla['retorno'] = self._retornos[tabla['posicion'].to_numpy()]
+
+        # Agregados precalculados por actor
+        resumen = tabla.groupby('nombre', sort=True)['retorno'].agg(['size', 'sum', 'mean'])
+        self._posiciones = tabla['posicion'].to_numpy()
+        fines = resumen['size'].cumsum().to_numpy()
+        self._actores = {
+            nombre: (fin - cantidad, fin, total, promedio)
+            for nombre, cantidad, total, promedio, fin in zip(
+                resumen.index, resumen['size'], resumen['sum'], resumen['mean'], fines)
+        }
+
+        # Lista ordenada de nombres para las búsquedas por prefijo, y los mismos nombres
+        # unidos en un solo texto para buscar subcadenas con str.find sin recorrer filas
+        self._nombres = resumen.index.tolist()
+        self._texto = '\n'.join(self._nombres)
+        self._inicios = list(itertools.accumulate((len(n) + 1 for n in self._nombres[:-1]), initial=0))
+
+    def __len__(self):
+        return len(self._nombres)
+
+    # Devuelve un índice nuevo para una versión actualizada del dataset (ver
+    # calcular_origen): los pares de las filas que no cambiaron se conservan con su
+    # posición nueva y solo se separan y normalizan los actores de las filas nuevas
+    def actualizar(self, actores, retornos, origen):
+        destino = calcular_destino(origen, len(self._retornos))
+        cantidades = [self._actores[nombre][1] - self._actores[nombre][0] for nombre in self._nombres]
+        nombres = np.repeat(np.array(self._nombres, dtype=object), cantidades)
+        posiciones = destino[self._posiciones]
+        conservados = posiciones >= 0
+
+        nuevas = np.flatnonzero(origen < 0)
+        nombres_nuevos, posiciones_nuevas = self._pares(actores.iloc[nuevas], nuevas)
+        indice = IndiceActores.__new__(IndiceActores)
+        indice._armar(np.concatenate([nombres[conservados], nombres_nuevos]),
+                      np.concatenate([posiciones[conservados], posiciones_nuevas]),
+                      valores_float64(retornos, DECIMALES_RETORNO))
+        return indice
+
+    # Devuelve los nombres normalizados que coinciden con la consulta según el modo
+    def nombres(self, consulta, modo='exacto'):
+        consulta = normalizar_texto(consulta)
+        if not consulta:
+            return []
+        if modo == 'exacto':
+            return [consulta] if consulta in self._actores else []
+        if modo == 'prefijo':
+            inicio = bisect.bisect_left(self._nombres, consulta)
+            encontrados = []
+            for nombre in self._nombres[inicio:]:
+                if not nombre.startswith(consulta):
+                    break
+                encontrados.append(nombre)
+            return encontrados
+        if modo == 'contiene':
+            encontrados = []
+            desde = self._texto.find(consulta)
+            while desde != -1:
+                i = bisect.bisect_right(self._inicios, desde) - 1
+                encontrados.append(self._nombres[i])
+                if i + 1 == len(self._nombres):
+                    break
+                desde = self._texto.find(consulta, self._inicios[i + 1])
+            return encontrados
+        raise ValueError(f"Modo de búsqueda inválido: {modo}")
+
+    # Devuelve (cantidad de películas, retorno total, retorno promedio) o None
+    def resumen(self, consulta, modo='exacto'):
+        nombres = self.nombres(consulta, modo)
+        if not nombres:
+            return None
+        if len(nombres) == 1:
+            inicio, fin, total, promedio = self._actores[nombres[0]]
+            return int(fin - inicio), float(total), float(promedio)
+
+        # Varios actores coinciden: se cuentan una sola vez las películas compartidas
+        posiciones = np.unique(np.concatenate(
+            [self._posiciones[self._actores[n][0]:self._actores[n][1]] for n in nombres]))
+        retornos = self._retornos[posiciones]
+        return len(posiciones), float(np.nansum(retornos)), float(np.nanmean(retornos))
+
+# Tablas de conteo por calendario: cubos año x mes y año x día de la semana.
+# Sumando todos los años se obtienen las tablas de 12 y 7 entradas, así los
+# endpoints de mes y día responden con una consulta O(1), con o sin rango de años
+class TablasCalendario:
+
+    def __init__(self, fechas, meses, dias_semana):
+        validas = fechas.notna().to_numpy()
+        anios = fechas.dt.year.to_numpy()[validas].astype(int)
+        meses = meses.to_numpy()[validas].astype(int)
+        dias_semana = dias_semana.to_numpy()[validas].astype(int)
+
+        self._anio_min = int(anios.min()) if len(anios) else 0
+        filas = anios - self._anio_min
+        n_anios = int(filas.max()) + 1 if len(filas) else 0
+        self._cubo_meses = np.bincount(filas * 12 + meses - 1, minlength=n_anios * 12).reshape(n_anios, 12)
+        self._cubo_dias = np.bincount(filas * 7 + dias_semana, minlength=n_anios * 7).reshape(n_anios, 7)
+        self._total_meses = self._cubo_meses.sum(axis=0)
+        self._total_dias = self._cubo_dias.sum(axis=0)
+
+    # Selecciona del cubo las filas de los años pedidos (ambos extremos incluidos)
+    def _filtrar(self, cubo, total, anio_desde, anio_hasta):
+        if anio_desde is None and anio_hasta is None:
+            return total
+        desde = 0 if anio_desde is None else max(anio_desde - self._anio_min, 0)
+        hasta = len(cubo) if anio_hasta is None else max(anio_hasta - self._anio_min + 1, 0)
+        return cubo[desde:hasta].sum(axis=0)
+
+    # Cantidad de películas estrenadas en el mes (1-12)
+    def contar_mes(self, mes, anio_desde=None, anio_hasta=None):
+        return int(self._filtrar(self._cubo_meses, self._total_meses, anio_desde, anio_hasta)[mes - 1])
+
+    # Cantidad de películas estrenadas en el día de la semana (0 = lunes)
+    def contar_dia(self, dia, anio_desde=None, anio_hasta=None):
+        return int(self._filtrar(self._cubo_dias, self._total_dias, anio_desde, anio_hasta)[dia])
+
+# Campos de cada película en la respuesta de get_director (se puede ordenar por cualquiera)
+COLUMNAS_DIRECTOR = ('titulo', 'año_lanzamiento', 'retorno_pelicula', 'budget_pelicula', 'revenue_pelicula')
+
+# Índice de directores: nombre normalizado -> (retorno total, lista de películas, lista
+# ya serializada a JSON).
+# Las películas se agrupan una sola vez al cargar el dataset y se convierten a
+# diccionarios columna por columna con to_dict('records'), sin recorrer filas.
+# La lista completa de cada director se serializa también una sola vez, así la consulta
+# sin orden ni paginación (la más común) no vuelve a serializar las películas
+class IndiceDirectores:
+
+    def __init__(self, data):
+        directores = data['director']
+        normalizados = {nombre: normalizar_texto(nombre) for nombre in directores.dropna().unique()}
+        # Código del director de cada fila (-1 si no tiene) y clave de cada código
+        self._codigos, claves = pd.factorize(directores.map(normalizados))
+        self._claves = list(claves)
+        self._directores = self._agrupar(data, np.flatnonzero(self._codigos >= 0))
+
+    # Agrupa por director las películas de las filas indicadas
+    def _agrupar(self, data, filas):
+        # Ordenar las películas por director conservando el orden original del dataset
+        orden = filas[np.argsort(self._codigos[filas], kind='stable')]
+        peliculas = pd.DataFrame({
+            'titulo': data['title'].to_numpy()[orden],
+            'año_lanzamiento': data['release_year'].to_numpy()[orden],
+            'retorno_pelicula': valores_float64(data['return'], DECIMALES_RETORNO)[orden],
+            'budget_pelicula': valores_float64(data['budget'])[orden],
+            'revenue_pelicula': valores_float64(data['revenue'])[orden],
+        })
+        registros = peliculas.to_dict('records')
+
+        codigos, cantidades = np.unique(self._codigos[orden], return_counts=True)
+        totales = peliculas.groupby(self._codigos[orden], sort=True)['retorno_pelicula'].sum()
+        fines = np.cumsum(cantidades)
+        directores = {}
+        for codigo, total, cantidad, fin in zip(codigos, totales.to_numpy(), cantidades, fines):
+            registros_director = registros[fin - cantidad:fin]
+            directores[self._claves[codigo]] = (float(total), registros_director, Fragmento(a_json(registros_director)))
+        return directores
+
+    # Devuelve un índice nuevo para una versión actualizada del dataset (ver
+    # calcular_origen). Solo se vuelven a agrupar los directores con alguna película
+    # nueva, modificada o eliminada; los demás conservan su lista de películas.
+    # Si las filas que se conservan cambiaron de orden se reconstruye todo el índice
+    def actualizar(self, data, origen):
+        conservadas = np.flatnonzero(origen >= 0)
+        if np.any(np.diff(origen[conservadas]) < 0):
+            return IndiceDirectores(data)
+        nuevas = np.flatnonzero(origen < 0)
+        eliminadas = np.flatnonzero(calcular_destino(origen, len(self._codigos)) < 0)
+
+        indice = IndiceDirectores.__new__(IndiceDirectores)
+        indice._claves = list(self._claves)
+        codigos_claves = {clave: codigo for codigo, clave in enumerate(indice._claves)}
+        indice._codigos = np.full(len(data), -1, dtype=self._codigos.dtype)
+        indice._codigos[conservadas] = self._codigos[origen[conservadas]]
+        for posicion, nombre in zip(nuevas, data['director'].iloc[nuevas]):
+            if pd.isna(nombre):
+                continue
+            clave = normalizar_texto(nombre)
+            if clave not in codigos_claves:
+                codigos_claves[clave] = len(indice._claves)
+                indice._claves.append(clave)
+            indice._codigos[posicion] = codigos_claves[clave]
+
+        afectados = np.union1d(self._codigos[eliminadas], indice._codigos[nuevas])
+        afectados = afectados[afectados >= 0]
+        indice._directores = dict(self._directores)
+        for codigo in afectados:
+            indice._directores.pop(indice._claves[codigo], None)
+        indice._directores.update(indice._agrupar(data, np.flatnonzero(np.isin(indice._codigos, afectados))))
+        return indice
+
+    # Devuelve (retorno total, cantidad de películas, películas) del director, o None
+    # si no existe.
+    # Las películas se pueden ordenar por una columna ('-columna' para orden
+    # descendente) y paginar con offset y limit. Sin orden ni paginación se devuelve
+    # la lista ya serializada (un Fragmento de JSON)
+    def buscar(self, nombre, sort=None, offset=0, limit=None):
+        director = self._directores.get(normalizar_texto(nombre))
+        if director is None:
+            return None
+        retorno_total, peliculas, serializadas = director
+        if sort is None and offset == 0 and limit is None:
+            return retorno_total, len(peliculas), serializadas
+        if sort is not None:
+            columna = sort.lstrip('-')
+            if columna not in COLUMNAS_DIRECTOR:
+                raise ValueError(f"Orden inválido: {sort}")
+            # Las películas sin valor (título nulo, año pd.NA, NaN) no se pueden comparar:
+            # van al final en los dos sentidos, como con na_position='last' de pandas
+            nulas = [pelicula for pelicula in peliculas if pd.isna(pelicula[columna])]
+            peliculas = sorted((pelicula for pelicula in peliculas if not pd.isna(pelicula[columna])),
+                               key=lambda pelicula: pelicula[columna], reverse=sort.startswith('-')) + nulas
+        fin = None if limit is None else offset + limit
+        return retorno_total, len(peliculas), peliculas[offset:fin]
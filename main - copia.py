@@ -1,7 +1,6 @@
 import pandas as pd
 import datetime
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
+from recomendador import MotorTfidf
 
 # Cargar el DataFrame
 data = pd.read_csv('PI_RuthCastañeda/data_preparada_parte1.csv')
@@ -9,13 +8,10 @@ data = pd.read_csv('PI_RuthCastañeda/data_preparada_parte1.csv')
 # Preprocesamiento de datos
 data['genre'] = data['genre'].apply(lambda x: ' '.join(set(str(x).split(','))))
 
-# Crear una matriz TF-IDF para el texto del título de las películas
+# Crear el motor TF-IDF para el texto del título de las películas.
+# La matriz se mantiene dispersa: las similitudes del coseno se calculan por consulta
 stopwords_custom = ["the", "and", "in", "of"]
-tfidf = TfidfVectorizer(stop_words=stopwords_custom)
-tfidf_matrix = tfidf.fit_transform(data['title'])
-
-# Calcular la similitud del coseno entre los títulos de las películas
-cosine_similarities = linear_kernel(tfidf_matrix, tfidf_matrix)
+motor_tfidf = MotorTfidf(data, stop_words=stopwords_custom)
 
 # Función: Cantidad de filmaciones por mes
 def cantidad_filmaciones_mes(mes: str):
@@ -137,10 +133,8 @@ def recomendacion(titulo):
     
     indices = pd.Series(data.index, index=data['title']).drop_duplicates()
     idx = indices[titulo]
-    sim_scores = list(enumerate(cosine_similarities[idx]))
-    sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-    sim_scores = sim_scores[1:6]
-    movie_indices = [x[0] for x in sim_scores]
+    # Obtener las 6 películas más similares y descartar la primera (la propia película)
+    movie_indices = motor_tfidf.vecinos(idx, k=6)[1:6]
     respuesta_recomendacion = data['title'].iloc[movie_indices].tolist()
     
     return {'lista recomendada': respuesta_recomendacion}
@@ -1,19 +1,343 @@
-from fastapi import FastAPI
-import pandas as pd
-import datetime
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
-from sklearn.neighbors import NearestNeighbors
+import os
+import time
+import asyncio
+import functools
+import contextlib
+import traceback
+from typing import Annotated
+from fastapi import FastAPI, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from pydantic import BaseModel, Field
+from indices import MODOS_BUSQUEDA, COLUMNAS_DIRECTOR
+from carga import RUTA_ARTEFACTO, RUTA_DATOS, cargar_datos, leer_cambios, reportar_memoria, rutas_auxiliares
+from memoria_compartida import ARCHIVO_DATOS, adjuntar_datos, adjuntar_caracteristicas, adjuntar_vecinos
+from estado import Instantanea, NoListo, Recargador
+from vecinos import leer_vecinos
+from cache import CacheRespuestas
+from serializacion import RespuestaJSON, a_json
+from metricas import PERFILADO, MiddlewareMetricas, metricas, perfil_pedido, perfilar, recolectar, registrar_etapa, span
+from ejecucion import PoolPesado
 
-# Crear una instancia de la aplicación
-app = FastAPI()
+# Modo de ejecución de los endpoints (variable de entorno MODO_EJECUCION):
+# - 'hilos' (por defecto): todos los endpoints corren en el threadpool de Starlette
+# - 'procesos': los endpoints livianos corren como async dentro del event loop y los
+#   costosos (recomendación, actores, directores) en un pool de procesos acotado,
+#   configurable con POOL_PROCESOS y POOL_MAX_COLA
+MODO_EJECUCION = os.environ.get('MODO_EJECUCION', 'hilos')
+pool_pesado = None
+if MODO_EJECUCION == 'procesos':
+    pool_pesado = PoolPesado(__name__,
+                             procesos=int(os.environ.get('POOL_PROCESOS', 0)) or None,
+                             max_cola=int(os.environ['POOL_MAX_COLA']) if os.environ.get('POOL_MAX_COLA') else None)
 
-# Cargamos el dataframe
-data = pd.read_csv('data_preparadaML.csv')
+# Recarga del dataset en caliente (ver estado.py). Con RECARGA_INTERVALO (segundos) se
+# vigilan los archivos de datos y se recargan solos cuando cambian; también se puede
+# pedir con POST /admin/recargar, protegido con ADMIN_TOKEN (sin ADMIN_TOKEN los endpoints
+# de administración responden siempre 403)
+RECARGA_INTERVALO = float(os.environ['RECARGA_INTERVALO']) if os.environ.get('RECARGA_INTERVALO') else None
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+
+# Modo de arranque (variable de entorno ARRANQUE):
+# - 'completo' (por defecto): al importar la aplicación se construyen el dataset, todos los
+#   índices y el recomendador, y la aplicación recién atiende cuando todo está listo
+# - 'diferido': al importar solo se cargan el dataset, las tablas de calendario y el índice
+#   de títulos, y la aplicación atiende enseguida los endpoints que los usan. El resto
+#   (trigramas, actores, directores, recomendador y el pool de procesos) se construye en
+#   segundo plano al iniciar; mientras tanto esos endpoints responden 503 con Retry-After.
+#   GET /listo informa qué partes ya están listas.
+# Los procesos del pool (marcados con PROCESO_POOL=1, ver entorno_pool) importan la
+# aplicación completa: no atienden hasta estar listos. Los workers de uvicorn o gunicorn
+# no se marcan, así que cada uno arranca en el modo pedido
+ARRANQUE = os.environ.get('ARRANQUE', 'completo')
+DIFERIR = ARRANQUE == 'diferido' and os.environ.get('PROCESO_POOL') != '1'
+
+# Estado del calentamiento en segundo plano del modo diferido
+calentamiento = {'inicio': time.time(), 'fin': None, 'error': None}
+
+# Función: Construir las partes pendientes de la instantánea y después arrancar el pool de
+# procesos (así sus procesos parten de la instantánea completa)
+def calentar():
+    try:
+        with span('completar_instantanea'):
+            recargador.completar()
+        if pool_pesado is not None and not pool_pesado.activo:
+            pool_pesado.iniciar(entorno_pool(recargador.instantanea))
+    except Exception:
+        calentamiento['error'] = traceback.format_exc(limit=1)
+    calentamiento['fin'] = time.time()
+
+# Al iniciar la aplicación se arranca el pool de procesos (si corresponde), cuando el
+# dataset ya está cargado, y la vigilancia de los archivos de datos. Se detienen al apagarla.
+# En el modo diferido el pool se arranca al terminar de calentar, en un hilo aparte
+@contextlib.asynccontextmanager
+async def ciclo_de_vida(app):
+    tarea = None
+    if DIFERIR:
+        tarea = asyncio.create_task(asyncio.to_thread(calentar))
+    else:
+        if pool_pesado is not None:
+            pool_pesado.iniciar(entorno_pool(recargador.instantanea))
+        calentamiento['fin'] = time.time()
+    if RECARGA_INTERVALO:
+        recargador.vigilar(RECARGA_INTERVALO)
+    yield
+    if tarea is not None:
+        await tarea
+    recargador.detener()
+    if pool_pesado is not None:
+        pool_pesado.detener()
+
+# Crear una instancia de la aplicación (las respuestas JSON se serializan con orjson)
+app = FastAPI(lifespan=ciclo_de_vida, default_response_class=RespuestaJSON)
+
+# Latencia por ruta de todas las consultas, expuesta en /metrics (ver metricas.py)
+app.add_middleware(MiddlewareMetricas)
+
+# Directorio con el dataset compartido entre workers (ver memoria_compartida.py).
+# Si está definido, el dataset y la matriz del recomendador se abren sin copiarlos
+DATOS_COMPARTIDOS = os.environ.get('DATOS_COMPARTIDOS')
+
+# Recomendador (variable de entorno RECOMENDADOR): con 'tabla' (por defecto) se usa la
+# tabla de vecinos precalculada por el ETL si corresponde al dataset cargado (ver
+# vecinos.py) y si no, el modelo; con 'modelo' se ajusta siempre el modelo al cargar
+RECOMENDADOR = os.environ.get('RECOMENDADOR', 'tabla')
+
+# Función: Armar la instantánea de datos de la API (dataset, índices y recomendador).
+# Al recargar, si el manifiesto del ETL describe los cambios desde la versión del
+# artefacto que está cargada, solo se actualizan las películas que cambiaron
+def cargar_instantanea(anterior=None):
+    # Los procesos del pool empiezan con la versión publicada en el proceso principal
+    # (ver entorno_pool), así sus respuestas se pueden guardar en el caché
+    version = int(os.environ.get('VERSION_DATOS', 1)) if anterior is None else anterior.version + 1
+
+    # Cargamos el dataframe (release_date ya convertida a fecha, con columnas de mes y día)
+    if DATOS_COMPARTIDOS:
+        with span('cargar_datos'):
+            data = adjuntar_datos(DATOS_COMPARTIDOS)
+        reportar_memoria(data)
+        vecinos = None
+        if RECOMENDADOR == 'tabla':
+            with span('cargar_vecinos'):
+                vecinos = adjuntar_vecinos(DATOS_COMPARTIDOS, data)
+        # La matriz del recomendador solo se abre si no hay tabla de vecinos
+        caracteristicas = adjuntar_caracteristicas(DATOS_COMPARTIDOS) if vecinos is None else None
+        return Instantanea(data, version, caracteristicas, vecinos=vecinos, diferir=DIFERIR and anterior is None)
+
+    # El manifiesto se lee antes que el artefacto: si el ETL lo reemplaza en el medio,
+    # las versiones no coinciden y la próxima recarga construye todo de cero
+    cambios = leer_cambios() or {}
+    with span('cargar_datos'):
+        data = cargar_datos()
+
+    # Mostrar la memoria que ocupa cada columna (las columnas ya tienen tipos compactos)
+    reportar_memoria(data)
+
+    vecinos = None
+    if RECOMENDADOR == 'tabla':
+        with span('cargar_vecinos'):
+            vecinos = leer_vecinos(data)
+
+    # La primera carga del modo diferido deja pendientes los índices y el recomendador
+    # (ver ARRANQUE); una recarga a partir de una instantánea incompleta arma todo de cero
+    if (anterior is not None and anterior.completa and cambios.get('incremental')
+            and anterior.version_artefacto is not None
+            and cambios.get('version_anterior') == anterior.version_artefacto):
+        return anterior.actualizar(data, cambios['modificadas'], cambios.get('version'), vecinos)
+    return Instantanea(data, version, version_artefacto=cambios.get('version'), vecinos=vecinos,
+                       diferir=DIFERIR and anterior is None)
+
+# Función: Variables de entorno de los procesos del pool: la marca de proceso del pool
+# (ver ARRANQUE) y la versión de la instantánea publicada, que cargan desde los mismos
+# archivos
+def entorno_pool(instantanea):
+    return {'PROCESO_POOL': '1', 'VERSION_DATOS': str(instantanea.version)}
+
+# Función: Después de publicar una instantánea nueva se reinician los procesos del pool,
+# que así parten de los datos nuevos
+def reiniciar_pool(instantanea):
+    if pool_pesado is not None and pool_pesado.activo:
+        pool_pesado.reiniciar(entorno_pool(instantanea))
+
+# Archivos que se vigilan para recargar: el artefacto y el manifiesto del ETL (o el CSV
+# si no hay artefacto), o el dataset compartido. La tabla de vecinos no se vigila: el ETL
+# la escribe antes que el artefacto (si se recalcula aparte, con POST /admin/recargar)
+if DATOS_COMPARTIDOS:
+    rutas_vigiladas = [os.path.join(DATOS_COMPARTIDOS, ARCHIVO_DATOS)]
+elif os.path.exists(RUTA_ARTEFACTO):
+    rutas_vigiladas = [RUTA_ARTEFACTO, rutas_auxiliares()[1]]
+else:
+    rutas_vigiladas = [RUTA_DATOS]
+
+# Cargar la primera instantánea al iniciar la aplicación
+recargador = Recargador(cargar_instantanea, rutas_vigiladas, al_publicar=reiniciar_pool)
+
+# Caché de respuestas de los endpoints de solo lectura. Se configura con las variables
+# de entorno CACHE_MAX_ENTRADAS (0 lo desactiva) y CACHE_TTL (segundos, opcional)
+cache_respuestas = CacheRespuestas(
+    max_entradas=int(os.environ.get('CACHE_MAX_ENTRADAS', 1024)),
+    ttl=float(os.environ['CACHE_TTL']) if os.environ.get('CACHE_TTL') else None)
+
+# Función: Versión actual de los datos que usan los endpoints (dataset, modelo de
+# recomendación y si la instantánea está completa). Si cambia, el caché de respuestas se
+# vacía solo
+def version_actual():
+    instantanea = recargador.instantanea
+    return instantanea.version, instantanea.motor_recomendacion.version, instantanea.completa
+
+# Función: Clave del caché para una ruta y sus parámetros. Solo los parámetros de la ruta
+# (el mes, el día, el título o el nombre buscado) van en minúsculas, igual que los pasa
+# a minúsculas cada endpoint; los de la consulta (modo, sort, ...) van tal cual, porque
+# los endpoints los comparan o los devuelven sin cambiarlos
+def clave_cache(path, parametros):
+    return (path,) + tuple(sorted(
+        (nombre, valor.lower() if isinstance(valor, str) and f'{{{nombre}}}' in path else valor)
+        for nombre, valor in parametros.items()))
+
+# Función: Ejecutar un endpoint y serializar su respuesta, midiendo cada parte como una
+# etapa (el nombre del endpoint y 'serializar')
+def ejecutar_y_serializar(funcion, parametros):
+    with span(funcion.__name__):
+        resultado = funcion(**parametros)
+    with span('serializar'):
+        return a_json(resultado)
+
+# Función: Ejecutar un endpoint por su nombre y devolver la respuesta ya serializada,
+# junto con la versión de los datos del proceso y las etapas medidas. Es lo que corre
+# dentro de los procesos del pool (así entre procesos solo viajan bytes)
+def ejecutar_serializado(nombre, parametros):
+    with recolectar() as etapas:
+        contenido = ejecutar_y_serializar(globals()[nombre], parametros)
+    return version_actual(), contenido, etapas
+
+# Función: Registrar un endpoint. Las consultas GET usan el caché de respuestas, donde se
+# guardan directamente los bytes JSON. Los endpoints marcados como pesados se envían al
+# pool de procesos en el modo 'procesos'. Las consultas con ?profile=1 (si PERFILADO=1)
+# se ejecutan con cProfile en el proceso principal y devuelven el reporte.
+# La función original no se modifica, así se puede seguir llamando directamente
+def ruta(path, metodo='get', pesada=False):
+    cachear = metodo == 'get'
+
+    def decorador(funcion):
+        if MODO_EJECUCION == 'procesos':
+            @functools.wraps(funcion)
+            async def endpoint(**parametros):
+                if PERFILADO and perfil_pedido.get():
+                    return PlainTextResponse(perfilar(funcion.__name__, funcion, parametros))
+                clave, version = clave_cache(path, parametros), version_actual()
+                contenido = cache_respuestas.obtener(clave, version) if cachear else None
+                if contenido is None:
+                    version_respuesta = version
+                    if pesada:
+                        # En el modo diferido el pool arranca después de calentar
+                        if DIFERIR and not pool_pesado.activo:
+                            raise NoListo('pool_procesos')
+                        # Durante una recarga el proceso puede tener todavía otra versión
+                        # de los datos: en ese caso la respuesta no se guarda en el caché
+                        version_respuesta, contenido, etapas = await pool_pesado.ejecutar(
+                            ejecutar_serializado, funcion.__name__, parametros)
+                        for etapa, segundos in etapas:
+                            registrar_etapa(etapa, segundos)
+                    else:
+                        contenido = ejecutar_y_serializar(funcion, parametros)
+                    if cachear and version_respuesta == version:
+                        cache_respuestas.guardar(clave, contenido, version)
+                return RespuestaJSON(contenido)
+        else:
+            @functools.wraps(funcion)
+            def endpoint(**parametros):
+                if PERFILADO and perfil_pedido.get():
+                    return PlainTextResponse(perfilar(funcion.__name__, funcion, parametros))
+                clave, version = clave_cache(path, parametros), version_actual()
+                contenido = cache_respuestas.obtener(clave, version) if cachear else None
+                if contenido is None:
+                    contenido = ejecutar_y_serializar(funcion, parametros)
+                    if cachear:
+                        cache_respuestas.guardar(clave, contenido, version)
+                return RespuestaJSON(contenido)
+
+        getattr(app, metodo)(path)(endpoint)
+        return funcion
+    return decorador
+
+# Estadísticas del caché de respuestas (aciertos, fallos y entradas guardadas)
+@app.get('/cache/estadisticas')
+def estadisticas_cache():
+    return cache_respuestas.estadisticas()
+
+# Estadísticas del modo de ejecución (procesos del pool, cola y consultas rechazadas)
+@app.get('/ejecucion/estadisticas')
+def estadisticas_ejecucion():
+    estadisticas = {'modo': MODO_EJECUCION}
+    if pool_pesado is not None:
+        estadisticas.update(pool_pesado.estadisticas())
+    return estadisticas
+
+# Medidores que se leen al exponer las métricas: caché, pool de procesos y recargas
+metricas.medidor('api_cache', 'Estado del caché de respuestas',
+                 lambda: {dato: valor for dato, valor in cache_respuestas.estadisticas().items()
+                          if dato in ('entradas', 'aciertos', 'fallos')}, etiqueta='dato')
+metricas.medidor('api_version_datos', 'Versión de la instantánea de datos publicada',
+                 lambda: recargador.instantanea.version)
+metricas.medidor('api_recargas', 'Recargas del dataset completadas', lambda: recargador.recargas)
+if pool_pesado is not None:
+    metricas.medidor('api_pool', 'Estado del pool de procesos',
+                     lambda: {dato: valor for dato, valor in pool_pesado.estadisticas().items()
+                              if dato in ('pendientes', 'rechazadas')}, etiqueta='dato')
+
+metricas.medidor('api_subsistema_listo', 'Partes de la aplicación ya construidas (1) o pendientes (0)',
+                 lambda: {nombre: int(listo) for nombre, listo in subsistemas().items()}, etiqueta='subsistema')
+
+# Métricas en el formato de texto de Prometheus: latencia por ruta, consultas por código
+# de estado, duración de las etapas internas y los medidores de arriba
+@app.get('/metrics', response_class=PlainTextResponse)
+def exponer_metricas():
+    return PlainTextResponse(metricas.exposicion(), media_type='text/plain; version=0.0.4')
+
+# Función: Estado de cada parte de la aplicación: las de la instantánea publicada y el
+# pool de procesos (en el modo 'procesos')
+def subsistemas():
+    estado = recargador.instantanea.subsistemas()
+    if pool_pesado is not None:
+        estado['pool_procesos'] = pool_pesado.activo
+    return estado
+
+# Disponibilidad de la aplicación: 200 cuando todo está listo y 503 mientras se calienta
+# (ver ARRANQUE), con el estado de cada parte. Sirve como readiness probe
+@app.get('/listo')
+def listo():
+    estado = subsistemas()
+    todo_listo = all(estado.values())
+    fin = calentamiento['fin']
+    contenido = {'listo': todo_listo, 'arranque': ARRANQUE, 'subsistemas': estado,
+                 'segundos_calentamiento': None if fin is None else round(fin - calentamiento['inicio'], 3),
+                 'error': calentamiento['error']}
+    return RespuestaJSON(contenido, status_code=200 if todo_listo else 503)
+
+# Función: Verificar el token de los endpoints de administración. Si ADMIN_TOKEN no está
+# definido quedan deshabilitados: nadie puede pedir recargas
+def verificar_admin(token):
+    if ADMIN_TOKEN is None:
+        raise HTTPException(status_code=403, detail="Endpoints de administración deshabilitados: falta definir ADMIN_TOKEN")
+    if token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+# Recargar el dataset, los índices y el recomendador en segundo plano. Responde enseguida;
+# las consultas siguen usando los datos actuales hasta que los nuevos están listos
+@app.post('/admin/recargar', status_code=202)
+def recargar_datos(x_admin_token: Annotated[str | None, Header()] = None):
+    verificar_admin(x_admin_token)
+    recargador.recargar()
+    return recargador.estadisticas()
+
+# Estado de las recargas (versión publicada, si hay una en curso y el último error)
+@app.get('/admin/estado')
+def estado_recarga(x_admin_token: Annotated[str | None, Header()] = None):
+    verificar_admin(x_admin_token)
+    return recargador.estadisticas()
 
 # Definir la función con el decorador
-@app.get("/cantidad_filmaciones_mes/{mes}")
-def cantidad_filmaciones_mes(mes: str):
+@ruta("/cantidad_filmaciones_mes/{mes}")
+def cantidad_filmaciones_mes(mes: str, anio_desde: int | None = None, anio_hasta: int | None = None):
     # Convertir el mes a minúsculas
     mes = mes.lower()
     
@@ -29,20 +353,17 @@ def cantidad_filmaciones_mes(mes: str):
     # Obtener el número de mes correspondiente
     mes_numero = meses_map[mes]
     
-    # Filtrar las filas que corresponden al mes consultado
-    peliculas_mes = data[data['release_date'].str.contains(f'-{mes_numero:02d}-')] # La expresión f'-{mes_numero:02d}-' genera una cadena de texto en formato '-MM-', donde 'MM' representa el número del mes formateado con 2 dígitos.
-
-    # Obtener la cantidad de películas en el mes consultado
-    cantidad = len(peliculas_mes)
+    # Obtener la cantidad de películas en el mes consultado desde la tabla precalculada
+    # (opcionalmente solo entre los años anio_desde y anio_hasta)
+    cantidad = recargador.instantanea.tablas_calendario.contar_mes(mes_numero, anio_desde, anio_hasta)
     
     # Devolver el resultado como un string formateado
     #return f"{cantidad} películas fueron estrenadas en el mes de {mes.capitalize()}" # capitalize() convierte el primer carácter de una cadena en mayúscula y el resto de los caracteres en minúscula.
     return {'mes':mes.capitalize(), 'cantidad':cantidad}
 
 # Definir la función
-@app.get("/cantidad_filmaciones_dia/{dia}")
-def cantidad_filmaciones_dia(dia: str): # Devuelve la cantidad de filmaciones 
-    contador = 0
+@ruta("/cantidad_filmaciones_dia/{dia}")
+def cantidad_filmaciones_dia(dia: str, anio_desde: int | None = None, anio_hasta: int | None = None): # Devuelve la cantidad de filmaciones 
 
     # Mapear los nombres de los dias en español a los números de los dias
     dias_semana = {"lunes": 0,"martes": 1,"miércoles": 2,"jueves": 3,
@@ -55,57 +376,77 @@ def cantidad_filmaciones_dia(dia: str): # Devuelve la cantidad de filmaciones
     if dia not in dias_semana:
         return f"Dia inválido: {dia}"
     
-    # Aquí deberías tener la lógica para obtener los datos del dataset y contar las películas estrenadas en el día consultado
-    # Asegúrate de tener la estructura adecuada del dataset y ajusta el código según tus necesidades
-    for fecha_estreno in data["release_date"]:
-        fecha_estreno_obj = datetime.datetime.strptime(fecha_estreno, "%Y-%m-%d") # strptime se utiliza para convertir una cadena de texto en un objeto de fecha y hora (datetime).
-
-        if fecha_estreno_obj.weekday() == dias_semana[dia]: # La función weekday() se utiliza para obtener el día de la semana correspondiente a un objeto datetime. Retorna un número entero que representa el día de la semana, donde el lunes es el día 0 y el domingo es el día 6.
-            contador += 1
+    # Obtener la cantidad de películas estrenadas en el día consultado desde la tabla precalculada
+    # (el día de la semana se numera igual que weekday(): el lunes es el 0 y el domingo el 6)
+    contador = recargador.instantanea.tablas_calendario.contar_dia(dias_semana[dia], anio_desde, anio_hasta)
 
     # return f"{contador} películas fueron estrenadas en los días {dia.capitalize()}" # capitalize() convierte el primer carácter de una cadena en mayúscula y el resto de los caracteres en minúscula.
     return {'dia':dia.capitalize(), 'cantidad':contador}
 
+# Similitud mínima (ver indices.IndiceTrigramas) para sugerir un título cuando no se
+# encuentra el pedido
+UMBRAL_SUGERENCIA = 0.4
+
+# Función: Agregar al mensaje de película no encontrada el título más parecido del
+# índice de trigramas ("¿Quisiste decir ...?"), si hay alguno suficientemente parecido
+def quisiste_decir(mensaje, titulo, instantanea):
+    # Mientras se construye el índice de trigramas (ARRANQUE diferido) no hay sugerencias
+    if not instantanea.completa:
+        return mensaje
+    parecidos = instantanea.indice_trigramas.parecidos(titulo, limite=1, umbral=UMBRAL_SUGERENCIA)
+    if not parecidos:
+        return mensaje
+    posicion = instantanea.indice_titulos.buscar(parecidos[0][0])
+    return f"{mensaje.rstrip('.')}. ¿Quisiste decir '{instantanea.data['title'].iat[posicion]}'?"
+
 # Definir la función
-@app.get("/score_titulo/{titulo_de_la_filmacion}")
+@ruta("/score_titulo/{titulo_de_la_filmacion}")
 def score_titulo(titulo_de_la_filmacion: str):
      # Convertir el título a minúsculas para la búsqueda
     titulo_de_la_filmacion = titulo_de_la_filmacion.lower()
     
-    # Buscar la película por título en el dataframe
-    pelicula = data[data['title'].str.lower() == titulo_de_la_filmacion]
+    # Tomar la instantánea actual de los datos (se usa la misma durante toda la consulta)
+    instantanea = recargador.instantanea
+    data = instantanea.data
+
+    # Buscar la posición de la película en el índice de títulos
+    posicion = instantanea.indice_titulos.buscar(titulo_de_la_filmacion)
     
     # Verificar si se encontró la película
-    if pelicula.empty: # El método empty devuelve True si el DataFrame está vacío.
-        return "Película no encontrada"
+    if posicion is None:
+        return quisiste_decir("Película no encontrada", titulo_de_la_filmacion, instantanea)
     
     # Obtener los valores de título, año de estreno y score
-    titulo = pelicula['title'].iloc[0] # iloc[0] sirve para acceder al primer registro
-    año_estreno = str(pelicula['release_year'].iloc[0])
-    score = str(pelicula['popularity'].iloc[0])
+    titulo = data['title'].iat[posicion] # iat accede directamente a la fila por su posición
+    año_estreno = str(data['release_year'].iat[posicion])
+    score = str(data['popularity'].iat[posicion])
     
     # return f"La pelicula {titulo} fue estrenada en el año {año_estreno} con un score de {score}."
     return {'titulo':titulo, 'anio':año_estreno, 'popularidad':score}
 
 # Definir la función con el decorador
-@app.get("/votos_titulo/{titulo_de_la_pelicula}")
+@ruta("/votos_titulo/{titulo_de_la_pelicula}")
 def votos_titulo(titulo_de_la_pelicula: str):
     
     # Convertir el título a minúsculas para la búsqueda
     titulo_de_la_pelicula = titulo_de_la_pelicula.lower()
     
-    # Buscar la película por título en el dataframe
-    pelicula = data[data['title'].str.lower() == titulo_de_la_pelicula]
+    # Tomar la instantánea actual de los datos (se usa la misma durante toda la consulta)
+    instantanea = recargador.instantanea
+    data = instantanea.data
+
+    # Buscar la posición de la película en el índice de títulos
+    posicion = instantanea.indice_titulos.buscar(titulo_de_la_pelicula)
     
     # Verificar si la película existe en el dataframe
-    if pelicula.empty:
-        return "La película no existe en el dataset."
+    if posicion is None:
+        return quisiste_decir("La película no existe en el dataset.", titulo_de_la_pelicula, instantanea)
     
     # Obtener los valores de título, cantidad de votos y valor promedio de las votaciones
-    titulo = pelicula['title'].iloc[0]
-    votos = pelicula['vote_count'].iloc[0]
-    promedio_votos = pelicula['vote_average'].iloc[0]
-    año_estreno = str(pelicula['release_year'].iloc[0])
+    titulo = data['title'].iat[posicion]
+    votos = float(data['vote_count'].iat[posicion])
+    promedio_votos = data['vote_average'].iat[posicion]
+    año_estreno = str(data['release_year'].iat[posicion])
 
     # Verificar si la película cumple con la condición de tener más de 2000 votos
     if votos < 2000:
@@ -115,108 +456,182 @@ def votos_titulo(titulo_de_la_pelicula: str):
         return {'titulo':titulo, 'anio':año_estreno, 'voto_total':votos, 'voto_promedio':promedio_votos}
 
 # Definir la función con el decorador
-@app.get("/get_actor/{nombre_actor}")
-def get_actor(nombre_actor: str):
+@ruta("/get_actor/{nombre_actor}", pesada=True)
+def get_actor(nombre_actor: str, modo: str = 'exacto'):
     # Convertir el nombre del actor a minúsculas para la búsqueda
     nombre_actor = nombre_actor.lower()
-    # Filtrar las filas que contienen al actor consultado
-    peliculas_actor = data[data['actor'].apply(lambda x: nombre_actor in str(x).lower())]
+
+    # Verificar si el modo de búsqueda es válido ('exacto', 'prefijo' o 'contiene')
+    if modo not in MODOS_BUSQUEDA:
+        return {"message": f"Modo de búsqueda inválido: {modo}"}
+
+    # Buscar al actor en el índice invertido
+    resumen_actor = recargador.instantanea.indice_actores.resumen(nombre_actor, modo)
     
     # Verificar si el actor existe en el dataset
-    if peliculas_actor.empty:
+    if resumen_actor is None:
         return {"message": f"No se encontraron películas para el actor: {nombre_actor}"}
     
     # Obtener la cantidad de películas y el promedio de retorno del actor
-    cantidad_peliculas = len(peliculas_actor)
-    promedio_retorno = peliculas_actor['return'].mean()
-    retorno = sum(peliculas_actor['return'])
+    cantidad_peliculas, retorno, promedio_retorno = resumen_actor
     return {'actor':nombre_actor, 'cantidad_filmaciones':cantidad_peliculas, 'retorno_total':retorno, 'retorno_promedio':promedio_retorno}
 
-@app.get('/get_director/{nombre_director}')
-def get_director(nombre_director: str):
+@ruta('/get_director/{nombre_director}', pesada=True)
+def get_director(nombre_director: str, limit: Annotated[int | None, Query(ge=1)] = None,
+                 offset: Annotated[int, Query(ge=0)] = 0, sort: str | None = None):
      # Convertir el nombre del director a minúsculas para la búsqueda
     nombre_director = nombre_director.lower()
-    # Filtrar las filas que contienen al director consultado
-    peliculas_director = data[data['director'].str.lower() == nombre_director]
+
+    # Verificar si la columna de orden es válida (con '-' adelante para orden descendente)
+    if sort is not None and sort.lstrip('-') not in COLUMNAS_DIRECTOR:
+        return {"message": f"Orden inválido: {sort}"}
+
+    # Buscar al director en el índice con sus películas ya agrupadas
+    director = recargador.instantanea.indice_directores.buscar(nombre_director, sort, offset, limit)
     
     # Verificar si el director existe en el dataset
-    if peliculas_director.empty:
+    if director is None:
         return {"message": f"No se encontraron películas para el director: {nombre_director}"}
     
-    # Calcular la suma del retorno de inversión total
-    retorno_total = peliculas_director['return'].sum()
-    
-    # Crear una lista para almacenar la información de cada película
-    peliculas_info = []
-    
-    # Recorrer cada película del director
-    for _, pelicula in peliculas_director.iterrows(): # iterrows() se utiliza para iterar sobre un DataFrame de Pandas fila por fila, cada iteración devuelve una tupla que contiene el índice de la fila y la serie de datos correspondiente a esa fila.
-        titulo = pelicula['title']
-        año_lanzamiento = pelicula['release_year']
-        retorno_individual = pelicula['return']
-        costo = pelicula['budget']
-        ganancia = pelicula['revenue']
-        
-        # Crear un diccionario con la información de la película
-        pelicula_info = {
-            'titulo': titulo,
-            'año_lanzamiento': año_lanzamiento,
-            'retorno_pelicula': retorno_individual,
-            'budget_pelicula': costo,
-            'revenue_pelicula': ganancia
-        }
-        
-        # Agregar el diccionario a la lista de películas
-        peliculas_info.append(pelicula_info)
+    # Obtener la suma del retorno de inversión total y la página de películas pedida
+    retorno_total, cantidad_peliculas, peliculas_info = director
     
     # Crear el diccionario de respuesta con la suma del retorno total y la lista de películas
     respuesta = {
         'director': nombre_director,
         'retorno_total': retorno_total,
+        'cantidad_peliculas': cantidad_peliculas,
         'peliculas': peliculas_info
     }
     
     return respuesta
-@app.get('/recomendacion/{titulo}')
+@ruta('/recomendacion/{titulo}', pesada=True)
 # Función: Recomendación de películas
 def recomendacion(titulo):
     # Convertir el título a minúsculas para la búsqueda
     titulo = titulo.lower()
 
-    # Verificar si el título existe en el dataset (ignorando mayúsculas)
-    movie = data[data['title'].str.lower() == titulo]
+    # Tomar la instantánea actual: el índice y el modelo tienen que ser de la misma versión
+    instantanea = recargador.instantanea
+
+    # Verificar si el título existe en el dataset (ignorando mayúsculas y tildes)
+    movie_index = instantanea.indice_titulos.buscar(titulo)
     
-    if movie.empty:
-        return f"No se encontró ninguna película con el título '{titulo}'."
+    if movie_index is None:
+        return quisiste_decir(f"No se encontró ninguna película con el título '{titulo}'.", titulo, instantanea)
 
-    # Obtener la popularidad de la película encontrada
-    movie_popularity = movie['popularity'].values[0]
+    # Encontrar las películas más similares a la que seleccionamos
 
-    # Crear una matriz de características para el modelo de vecinos más cercanos
-    features = data[['popularity']]
-    genres = data['genre'].str.get_dummies(sep=' ')
-    features = pd.concat([features, genres], axis=1)
+    # Obtener los títulos de las películas recomendadas, excluyendo la original
+    return instantanea.motor_recomendacion.recomendar(movie_index)
 
-    # Manejar valores faltantes (NaN) reemplazándolos por ceros
-    features = features.fillna(0)
+@ruta('/buscar')
+# Función: Autocompletar títulos: primero los que empiezan con el texto y después los más
+# parecidos (tolera errores de tipeo, tildes y palabras en otro orden)
+def buscar(titulo: str, limite: Annotated[int, Query(ge=1, le=50)] = 10):
+    instantanea = recargador.instantanea
+    data = instantanea.data
+    resultados = []
+    for clave, similitud, coincidencia in instantanea.indice_trigramas.sugerir(titulo, limite):
+        posicion = instantanea.indice_titulos.buscar(clave)
+        resultados.append({'titulo': data['title'].iat[posicion], 'anio': str(data['release_year'].iat[posicion]),
+                           'similitud': round(similitud, 3), 'coincidencia': coincidencia})
+    return {'busqueda': titulo, 'resultados': resultados}
 
-    # Crear el modelo de vecinos más cercanos
-    nn_model = NearestNeighbors(n_neighbors=6, metric='euclidean')
-    nn_model.fit(features)
+# Consultas en lote: resuelven muchas claves en una sola petición.
+# Cada clave tiene su propio resultado o su propio error, en el mismo orden recibido.
+# Todas son pesadas: con muchas claves no encontradas, la búsqueda de sugerencias de
+# cada una (ver quisiste_decir) bloquearía el event loop en el modo 'procesos'
 
-    # Encontrar las películas más similares a la que seleccionamos
-    movie_index = movie.index[0]  # Obtener el índice de la película encontrada
-    _, indices = nn_model.kneighbors([features.iloc[movie_index].values], n_neighbors=6)
+# Cantidad máxima de claves por petición
+MAX_LOTE = 1000
 
-    # Obtener los títulos de las películas recomendadas, excluyendo la original
-    recomendacion = data.iloc[indices[0][1:]]['title']
+class Lote(BaseModel):
+    claves: list[str] = Field(min_length=1, max_length=MAX_LOTE)
 
-    return recomendacion.tolist()
+class LoteActores(Lote):
+    modo: str = 'exacto'
 
-    
-    
-    
-    return {'lista recomendada': respuesta_recomendacion}
+# Función: Armar un resultado de lote por clave: si hay mensaje de error se informa
+# como error, si no se devuelve el resultado
+def resultado_lote(clave, resultado=None, error=None):
+    if error is not None:
+        return {'clave': clave, 'error': error}
+    return {'clave': clave, 'resultado': resultado}
+
+# Función: Buscar todas las claves en el índice de títulos y leer de una vez (una sola
+# selección por columna) los valores de las películas encontradas
+def buscar_titulos_lote(instantanea, claves, columnas):
+    posiciones = [instantanea.indice_titulos.buscar(clave) for clave in claves]
+    encontradas = [posicion for posicion in posiciones if posicion is not None]
+    valores = {columna: instantanea.data[columna].iloc[encontradas].to_numpy() for columna in columnas}
+    filas = iter(range(len(encontradas)))
+    return [None if posicion is None else next(filas) for posicion in posiciones], valores
+
+@ruta('/lote/score_titulo', metodo='post', pesada=True)
+def score_titulo_lote(lote: Lote):
+    instantanea = recargador.instantanea
+    filas, valores = buscar_titulos_lote(instantanea, lote.claves, ['title', 'release_year', 'popularity'])
+    resultados = []
+    for clave, fila in zip(lote.claves, filas):
+        if fila is None:
+            resultados.append(resultado_lote(clave, error=quisiste_decir("Película no encontrada", clave, instantanea)))
+            continue
+        resultados.append(resultado_lote(clave, {'titulo': valores['title'][fila],
+                                                 'anio': str(valores['release_year'][fila]),
+                                                 'popularidad': str(valores['popularity'][fila])}))
+    return {'resultados': resultados}
+
+@ruta('/lote/votos_titulo', metodo='post', pesada=True)
+def votos_titulo_lote(lote: Lote):
+    instantanea = recargador.instantanea
+    filas, valores = buscar_titulos_lote(instantanea, lote.claves, ['title', 'vote_count', 'vote_average', 'release_year'])
+    resultados = []
+    for clave, fila in zip(lote.claves, filas):
+        if fila is None:
+            resultados.append(resultado_lote(clave, error=quisiste_decir("La película no existe en el dataset.", clave, instantanea)))
+            continue
+        titulo = valores['title'][fila]
+        votos = float(valores['vote_count'][fila])
+        if votos < 2000:
+            resultados.append(resultado_lote(clave, error=f"La película {titulo} no cumple con la condición de tener más de 2000 votos. La misma cuenta con {int(votos)} votos"))
+            continue
+        resultados.append(resultado_lote(clave, {'titulo': titulo, 'anio': str(valores['release_year'][fila]),
+                                                 'voto_total': votos, 'voto_promedio': float(valores['vote_average'][fila])}))
+    return {'resultados': resultados}
+
+@ruta('/lote/get_actor', metodo='post', pesada=True)
+def get_actor_lote(lote: LoteActores):
+    if lote.modo not in MODOS_BUSQUEDA:
+        return {"message": f"Modo de búsqueda inválido: {lote.modo}"}
+    indice_actores = recargador.instantanea.indice_actores
+    resultados = []
+    for clave in lote.claves:
+        nombre_actor = clave.lower()
+        resumen_actor = indice_actores.resumen(nombre_actor, lote.modo)
+        if resumen_actor is None:
+            resultados.append(resultado_lote(clave, error=f"No se encontraron películas para el actor: {nombre_actor}"))
+            continue
+        cantidad_peliculas, retorno, promedio_retorno = resumen_actor
+        resultados.append(resultado_lote(clave, {'actor': nombre_actor, 'cantidad_filmaciones': cantidad_peliculas,
+                                                 'retorno_total': retorno, 'retorno_promedio': promedio_retorno}))
+    return {'resultados': resultados}
+
+@ruta('/lote/recomendacion', metodo='post', pesada=True)
+def recomendacion_lote(lote: Lote):
+    instantanea = recargador.instantanea
+    posiciones = [instantanea.indice_titulos.buscar(clave) for clave in lote.claves]
+
+    # Una sola llamada a kneighbors con todas las películas encontradas
+    recomendaciones = iter(instantanea.motor_recomendacion.recomendar_lote(
+        [posicion for posicion in posiciones if posicion is not None]))
+    resultados = []
+    for clave, posicion in zip(lote.claves, posiciones):
+        if posicion is None:
+            resultados.append(resultado_lote(clave, error=quisiste_decir(f"No se encontró ninguna película con el título '{clave.lower()}'.", clave, instantanea)))
+            continue
+        resultados.append(resultado_lote(clave, next(recomendaciones)))
+    return {'resultados': resultados}
 
 
 # Ejecutar la aplicación con Uvicorn
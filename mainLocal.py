@@ -1,25 +1,33 @@
+import functools
 import pandas as pd
-import datetime
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import linear_kernel
+from recomendador import MotorTfidf
+from carga import cargar_datos
+from vecinos import leer_vecinos
 
-# Cargar el DataFrame que se ha dividido en dos partes para poderlo subir a GitHub
-parte1 = pd.read_csv('PI_RuthCastañeda/data_preparada_parte1.csv')
-parte2 = pd.read_csv('PI_RuthCastañeda/data_preparada_parte2.csv')
-
-# Concatenar el dataset en un DataFrame
-data =pd.concat([parte1,parte2], ignore_index = True)
+# Cargar el dataset completo desde el artefacto Parquet del ETL. Si no existe, se usan
+# las dos partes en CSV (divididas para poderlas subir a GitHub) concatenadas
+RUTA_ARTEFACTO_LOCAL = 'PI_RuthCastañeda/data_preparada.parquet'
+data = cargar_datos(RUTA_ARTEFACTO_LOCAL,
+                    ['PI_RuthCastañeda/data_preparada_parte1.csv', 'PI_RuthCastañeda/data_preparada_parte2.csv'],
+                    compacto=False)
 
 # Preprocesamiento de datos
 data['genre'] = data['genre'].apply(lambda x: ' '.join(set(str(x).split(','))))
 
-# Crear una matriz TF-IDF para el texto del título de las películas
+# Palabras que no se tienen en cuenta en los títulos
 stopwords_custom = ["the", "and", "in", "of"]
-tfidf = TfidfVectorizer(stop_words=stopwords_custom)
-tfidf_matrix = tfidf.fit_transform(data['title'])
 
-# Calcular la similitud del coseno entre los títulos de las películas
-cosine_similarities = linear_kernel(tfidf_matrix, tfidf_matrix)
+# Si hay una tabla de vecinos TF-IDF precalculada para este dataset (ver vecinos.py) las
+# recomendaciones salen de ella. Si no, se usa el motor TF-IDF para el texto del título
+# de las películas (la matriz se mantiene dispersa: las similitudes del coseno se
+# calculan por consulta)
+vecinos_tfidf = leer_vecinos(data, RUTA_ARTEFACTO_LOCAL, 'tfidf', {'stop_words': stopwords_custom})
+
+# Función: Motor TF-IDF, construido con la primera recomendación que lo necesita y no al
+# importar el módulo (así las demás funciones se pueden usar sin esperarlo)
+@functools.cache
+def obtener_motor_tfidf():
+    return MotorTfidf(data, stop_words=stopwords_custom)
 
 # Función: Cantidad de filmaciones por mes
 def cantidad_filmaciones_mes(mes: str):
@@ -34,14 +42,12 @@ def cantidad_filmaciones_mes(mes: str):
         return f"Mes inválido: {mes}"
     
     mes_numero = meses_map[mes]
-    peliculas_mes = data[data['release_date'].str.contains(f'-{mes_numero:02d}-')]
-    cantidad = len(peliculas_mes)
+    cantidad = int((data['mes'] == mes_numero).sum())
     
     return {'mes': mes.capitalize(), 'cantidad': cantidad}
 
 # Función: Cantidad de filmaciones por día
 def cantidad_filmaciones_dia(dia: str):
-    contador = 0
     dias_semana = {"lunes": 0, "martes": 1, "miércoles": 2, "jueves": 3,
                    "viernes": 4, "sábado": 5, "domingo": 6}
 
@@ -50,10 +56,7 @@ def cantidad_filmaciones_dia(dia: str):
     if dia not in dias_semana:
         return f"Dia inválido: {dia}"
     
-    for fecha_estreno in data["release_date"]:
-        fecha_estreno_obj = datetime.datetime.strptime(fecha_estreno, "%Y-%m-%d")
-        if fecha_estreno_obj.weekday() == dias_semana[dia]:
-            contador += 1
+    contador = int((data['dia_semana'] == dias_semana[dia]).sum())
     
     return {'dia': dia.capitalize(), 'cantidad': contador}
 
@@ -158,10 +161,11 @@ def recomendacion(titulo):
         idx = idx.iloc[0]
 
 
-    sim_scores = list(enumerate(cosine_similarities[idx]))
-    sim_scores = sorted(sim_scores, key=lambda x: x[1], reverse=True)
-    sim_scores = sim_scores[1:6]
-    movie_indices = [x[0] for x in sim_scores]
+    # Obtener las 6 películas más similares y descartar la primera (la propia película)
+    if vecinos_tfidf is not None:
+        movie_indices = vecinos_tfidf[idx, 1:6].tolist()
+    else:
+        movie_indices = obtener_motor_tfidf().vecinos(idx, k=6)[1:6]
     respuesta_recomendacion = data['title'].iloc[movie_indices].tolist()
  
 # CODIGO PRUEBA
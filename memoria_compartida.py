@@ -0,0 +1,73 @@
+# Dataset compartido entre los procesos de uvicorn/gunicorn.
+#
+# Un único proceso cargador escribe las columnas de la API (Arrow IPC), la matriz de
+# características del recomendador (.npy) y la tabla de vecinos precalculada (ver
+# vecinos.py) en un directorio, idealmente en memoria (por ejemplo /dev/shm). Cada worker
+# los abre con memory-map y sin copiarlos, así el sistema operativo comparte las mismas
+# páginas entre todos los procesos.
+#
+# Uso:
+#   python memoria_compartida.py /dev/shm/peliculas
+#   DATOS_COMPARTIDOS=/dev/shm/peliculas gunicorn -w 4 -k uvicorn.workers.UvicornWorker main:app
+import os
+import shutil
+import sys
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+from carga import RUTA_ARTEFACTO, cargar_datos
+from recomendador import construir_caracteristicas
+from vecinos import escribir_vecinos, leer_vecinos, rutas_vecinos
+
+ARCHIVO_DATOS = 'datos.arrow'
+ARCHIVO_CARACTERISTICAS = 'caracteristicas.npy'
+
+# Función: Escribir el dataset, la matriz del recomendador y la tabla de vecinos en el
+# directorio compartido. Cada archivo se escribe primero con otro nombre y luego se
+# renombra, para que un worker nunca abra un archivo a medio escribir
+def exportar(data, directorio, ruta_artefacto=RUTA_ARTEFACTO):
+    os.makedirs(directorio, exist_ok=True)
+
+    ruta_datos = os.path.join(directorio, ARCHIVO_DATOS)
+    tabla = pa.Table.from_pandas(data, preserve_index=False)
+    with pa.OSFile(ruta_datos + '.tmp', 'wb') as archivo:
+        with pa.ipc.new_file(archivo, tabla.schema) as escritor:
+            escritor.write_table(tabla)
+    os.replace(ruta_datos + '.tmp', ruta_datos)
+
+    ruta_caracteristicas = os.path.join(directorio, ARCHIVO_CARACTERISTICAS)
+    with open(ruta_caracteristicas + '.tmp', 'wb') as archivo:
+        np.save(archivo, construir_caracteristicas(data))
+    os.replace(ruta_caracteristicas + '.tmp', ruta_caracteristicas)
+
+    # La tabla de vecinos se copia de la del ETL si corresponde a este dataset (los
+    # metadatos al final, igual que en escribir_vecinos); si no, se calcula
+    if leer_vecinos(data, ruta_artefacto) is None:
+        escribir_vecinos(data, ruta_datos)
+        return
+    for origen, destino in zip(rutas_vecinos(ruta_artefacto), rutas_vecinos(ruta_datos)):
+        shutil.copyfile(origen, destino + '.tmp')
+        os.replace(destino + '.tmp', destino)
+
+# Función: Abrir el dataset compartido sin copiarlo. Los textos quedan como columnas
+# respaldadas por Arrow (string[pyarrow]) que apuntan al archivo mapeado, y las
+# columnas numéricas sin nulos se convierten a numpy sin copia
+def adjuntar_datos(directorio):
+    archivo = pa.memory_map(os.path.join(directorio, ARCHIVO_DATOS))
+    tabla = pa.ipc.open_file(archivo).read_all()
+    tipos = {pa.string(): pd.ArrowDtype(pa.string())}
+    return tabla.to_pandas(split_blocks=True, types_mapper=tipos.get)
+
+# Función: Abrir la matriz de características del recomendador en modo solo lectura
+def adjuntar_caracteristicas(directorio):
+    return np.load(os.path.join(directorio, ARCHIVO_CARACTERISTICAS), mmap_mode='r')
+
+# Función: Abrir la tabla de vecinos compartida (en modo mmap), o None si no corresponde
+# al dataset compartido
+def adjuntar_vecinos(directorio, data):
+    return leer_vecinos(data, os.path.join(directorio, ARCHIVO_DATOS))
+
+if __name__ == '__main__':
+    directorio = sys.argv[1] if len(sys.argv) > 1 else '/dev/shm/peliculas'
+    exportar(cargar_datos(), directorio)
+    print(f"Dataset compartido escrito en {directorio}")
@@ -0,0 +1,213 @@
+import bisect
+import contextlib
+import contextvars
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+from urllib.parse import parse_qs
+
+# Límites de los buckets de los histogramas de latencia, en segundos
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Histograma acumulativo al estilo de Prometheus: cantidad de observaciones por bucket,
+# suma y cantidad total
+class Histograma:
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self._conteos = [0] * (len(buckets) + 1)
+        self.suma = 0.0
+        self.cantidad = 0
+        self._lock = threading.Lock()
+
+    def observar(self, valor):
+        posicion = bisect.bisect_left(self.buckets, valor)
+        with self._lock:
+            self._conteos[posicion] += 1
+            self.suma += valor
+            self.cantidad += 1
+
+    # Devuelve [(límite, cantidad acumulada)], con '+Inf' como último límite
+    def acumulados(self):
+        with self._lock:
+            conteos = list(self._conteos)
+        acumulado, resultado = 0, []
+        for limite, conteo in zip(self.buckets + ('+Inf',), conteos):
+            acumulado += conteo
+            resultado.append((limite, acumulado))
+        return resultado
+
+# Función: Escribir las etiquetas de una serie en el formato de Prometheus
+def formatear_etiquetas(etiquetas):
+    if not etiquetas:
+        return ''
+    pares = []
+    for nombre, valor in etiquetas:
+        valor = str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pares.append(f'{nombre}="{valor}"')
+    return '{' + ','.join(pares) + '}'
+
+# Registro de métricas: histogramas y contadores por nombre y etiquetas, y medidores que
+# se leen en el momento de exponerlos. exposicion() devuelve todo en el formato de texto
+# de Prometheus
+class Metricas:
+
+    def __init__(self):
+        self._histogramas = {}
+        self._contadores = {}
+        self._medidores = {}
+        self._ayudas = {}
+        self._lock = threading.Lock()
+
+    def _serie(self, series, nombre, ayuda, etiquetas, crear):
+        clave = (nombre, tuple(etiquetas.items()))
+        serie = series.get(clave)
+        if serie is None:
+            with self._lock:
+                serie = series.setdefault(clave, crear())
+                self._ayudas.setdefault(nombre, ayuda)
+        return serie
+
+    def observar(self, nombre, ayuda, valor, **etiquetas):
+        self._serie(self._histogramas, nombre, ayuda, etiquetas, Histograma).observar(valor)
+
+    def contar(self, nombre, ayuda, **etiquetas):
+        contador = self._serie(self._contadores, nombre, ayuda, etiquetas, lambda: [0])
+        with self._lock:
+            contador[0] += 1
+
+    # Registra un medidor: leer() devuelve el valor actual, o un diccionario
+    # {etiqueta: valor} para varias series del mismo medidor
+    def medidor(self, nombre, ayuda, leer, etiqueta=None):
+        self._medidores[nombre] = (leer, etiqueta)
+        self._ayudas[nombre] = ayuda
+
+    def exposicion(self):
+        lineas = []
+        with self._lock:
+            histogramas = sorted(self._histogramas.items())
+            contadores = sorted((clave, valor[0]) for clave, valor in self._contadores.items())
+        anterior = None
+        for (nombre, etiquetas), histograma in histogramas:
+            if nombre != anterior:
+                lineas += [f'# HELP {nombre} {self._ayudas[nombre]}', f'# TYPE {nombre} histogram']
+                anterior = nombre
+            for limite, acumulado in histograma.acumulados():
+                lineas.append(f'{nombre}_bucket{formatear_etiquetas(etiquetas + (("le", limite),))} {acumulado}')
+            lineas.append(f'{nombre}_sum{formatear_etiquetas(etiquetas)} {histograma.suma}')
+            lineas.append(f'{nombre}_count{formatear_etiquetas(etiquetas)} {histograma.cantidad}')
+        for (nombre, etiquetas), valor in contadores:
+            if nombre != anterior:
+                lineas += [f'# HELP {nombre} {self._ayudas[nombre]}', f'# TYPE {nombre} counter']
+                anterior = nombre
+            lineas.append(f'{nombre}{formatear_etiquetas(etiquetas)} {valor}')
+        for nombre, (leer, etiqueta) in self._medidores.items():
+            lineas += [f'# HELP {nombre} {self._ayudas[nombre]}', f'# TYPE {nombre} gauge']
+            valor = leer()
+            if isinstance(valor, dict):
+                lineas += [f'{nombre}{formatear_etiquetas(((etiqueta, clave),))} {float(dato)}'
+                           for clave, dato in valor.items()]
+            else:
+                lineas.append(f'{nombre} {float(valor)}')
+        return '\n'.join(lineas) + '\n'
+
+# Registro global de la aplicación
+metricas = Metricas()
+
+# Etapas medidas dentro de la consulta actual. En los procesos del pool se juntan para
+# devolverlas con la respuesta y registrarlas en el proceso principal (ver recolectar)
+_etapas = contextvars.ContextVar('etapas', default=None)
+
+# Función: Registrar la duración de una etapa interna (carga, índices, modelo, búsqueda,
+# serialización...) en el histograma api_etapa_segundos
+def registrar_etapa(etapa, segundos):
+    metricas.observar('api_etapa_segundos', 'Duración de las etapas internas de los endpoints y de la carga',
+                      segundos, etapa=etapa)
+    etapas = _etapas.get()
+    if etapas is not None:
+        etapas.append((etapa, segundos))
+
+# Función: Medir un bloque de código como una etapa con nombre:
+#     with span('kneighbors'):
+#         ...
+@contextlib.contextmanager
+def span(etapa):
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_etapa(etapa, time.perf_counter() - inicio)
+
+# Función: Juntar en una lista las etapas medidas dentro del bloque
+@contextlib.contextmanager
+def recolectar():
+    etapas = []
+    token = _etapas.set(etapas)
+    try:
+        yield etapas
+    finally:
+        _etapas.reset(token)
+
+# Perfilado de una consulta: con PERFILADO=1, una consulta con ?profile=1 se ejecuta con
+# cProfile (sin usar el caché) y en lugar de su respuesta devuelve el reporte de las
+# funciones con más tiempo acumulado. Si PERFILADO_DIR está definido el perfil completo
+# también se guarda en ese directorio (se abre con pstats o snakeviz)
+PERFILADO = os.environ.get('PERFILADO') == '1'
+PERFILADO_DIR = os.environ.get('PERFILADO_DIR')
+
+# Si la consulta actual pidió perfilado (lo marca el middleware)
+perfil_pedido = contextvars.ContextVar('perfil_pedido', default=False)
+
+# Función: Si la cadena de consulta (en bytes, como viene en el scope ASGI) pide perfilado:
+# el parámetro profile tiene que valer exactamente 1 (no ?profile=10 ni ?xprofile=1)
+def pide_perfil(cadena_consulta):
+    return parse_qs(cadena_consulta.decode('latin-1')).get('profile') == ['1']
+
+# Función: Ejecutar funcion(**parametros) con cProfile y devolver el reporte de texto
+def perfilar(nombre, funcion, parametros, lineas=30):
+    perfil = cProfile.Profile()
+    inicio = time.perf_counter()
+    perfil.runcall(funcion, **parametros)
+    duracion = time.perf_counter() - inicio
+    if PERFILADO_DIR:
+        perfil.dump_stats(os.path.join(PERFILADO_DIR, f'{nombre}-{time.time_ns()}.prof'))
+    salida = io.StringIO()
+    salida.write(f'{nombre}({parametros}) en {duracion * 1e3:.2f} ms\n')
+    pstats.Stats(perfil, stream=salida).sort_stats('cumulative').print_stats(lineas)
+    return salida.getvalue()
+
+# Middleware ASGI: mide la latencia de cada consulta HTTP por ruta (la plantilla de la
+# ruta, no la URL, para no crear una serie por cada título buscado), método y código de
+# estado, y marca las consultas que piden perfilado
+class MiddlewareMetricas:
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            return await self.app(scope, receive, send)
+        estado = [500]
+
+        async def enviar(mensaje):
+            if mensaje['type'] == 'http.response.start':
+                estado[0] = mensaje['status']
+            await send(mensaje)
+
+        token = None
+        if PERFILADO and pide_perfil(scope.get('query_string', b'')):
+            token = perfil_pedido.set(True)
+        inicio = time.perf_counter()
+        try:
+            await self.app(scope, receive, enviar)
+        finally:
+            duracion = time.perf_counter() - inicio
+            if token is not None:
+                perfil_pedido.reset(token)
+            ruta = scope.get('route')
+            etiquetas = {'ruta': ruta.path if ruta is not None else 'sin_ruta', 'metodo': scope['method']}
+            metricas.observar('api_latencia_segundos', 'Latencia de las consultas HTTP', duracion, **etiquetas)
+            metricas.contar('api_consultas_total', 'Consultas HTTP atendidas', estado=estado[0], **etiquetas)
@@ -0,0 +1,181 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from metricas import span
+from vecinos import N_VECINOS
+
+# sklearn se importa recién al construir un modelo (importarlo tarda alrededor de medio
+# segundo): así importar este módulo es liviano y el arranque no paga ese costo hasta que
+# se necesita un recomendador (con la tabla de vecinos, nunca)
+
+# Películas por bloque al calcular los vecinos de todo el dataset (ver vecinos.py)
+FILAS_POR_BLOQUE = 4096
+
+# Función: Crear la matriz de características (popularidad + géneros) para el modelo
+def construir_caracteristicas(data):
+    return matriz_caracteristicas(data)[0]
+
+# Función: Crear la matriz de características junto con los nombres de sus columnas
+def matriz_caracteristicas(data):
+    features = data[['popularity']]
+    genres = data['genre'].str.get_dummies(sep=' ')
+    features = pd.concat([features, genres], axis=1)
+
+    # Manejar valores faltantes (NaN) reemplazándolos por ceros
+    features = features.fillna(0)
+
+    return features.to_numpy(dtype=float), features.columns.tolist()
+
+# Función: Actualizar la matriz de características para una versión nueva del dataset
+# (origen se obtiene con indices.calcular_origen). Las filas de las películas que no
+# cambiaron se copian de la matriz anterior y solo se calculan los géneros de las filas
+# nuevas. Las columnas de géneros que ya no aparecen se quitan, así el resultado es el
+# mismo que construir la matriz desde cero
+def actualizar_caracteristicas(features, columnas, data, origen):
+    conservadas = np.flatnonzero(origen >= 0)
+    nuevas = np.flatnonzero(origen < 0)
+    generos_nuevos = data['genre'].iloc[nuevas].str.get_dummies(sep=' ')
+    generos = sorted(set(columnas[1:]) | set(generos_nuevos.columns))
+    columna_genero = {genero: i + 1 for i, genero in enumerate(generos)}
+
+    matriz = np.zeros((len(data), len(generos) + 1))
+    matriz[:, 0] = data['popularity'].fillna(0).to_numpy(dtype=float)
+    matriz[np.ix_(conservadas, [columna_genero[genero] for genero in columnas[1:]])] = features[origen[conservadas], 1:]
+    matriz[np.ix_(nuevas, [columna_genero[genero] for genero in generos_nuevos.columns])] = generos_nuevos.to_numpy()
+
+    presentes = np.concatenate([[True], matriz[:, 1:].any(axis=0)])
+    return matriz[:, presentes], [columna for columna, presente in zip(columnas[:1] + generos, presentes) if presente]
+
+# Motor de recomendación: construye la matriz y ajusta el modelo una sola vez,
+# y luego responde cada consulta con una única llamada a kneighbors
+class MotorRecomendacion:
+
+    def __init__(self, data, caracteristicas=None, columnas=None):
+        # El motor no cambia después de construido (una versión nueva del dataset arma otro
+        # motor, ver actualizar): la versión es siempre 0 y forma parte de la versión de
+        # los datos que invalida el caché de respuestas (ver main.version_actual)
+        self.version = 0
+        # El estado: títulos, características, modelo y nombres de las columnas
+        self._estado = self._construir(data, caracteristicas, columnas)
+
+    @staticmethod
+    def _construir(data, caracteristicas=None, columnas=None):
+        from sklearn.neighbors import NearestNeighbors
+        if caracteristicas is None:
+            with span('matriz_caracteristicas'):
+                features, columnas = matriz_caracteristicas(data)
+            nn_model = NearestNeighbors(n_neighbors=N_VECINOS, metric='euclidean')
+        elif columnas is not None:
+            # Matriz ya calculada a partir de la anterior (ver actualizar)
+            features = caracteristicas
+            nn_model = NearestNeighbors(n_neighbors=N_VECINOS, metric='euclidean')
+        else:
+            # Matriz ya construida (por ejemplo mapeada desde memoria compartida): con
+            # 'brute' el modelo la usa tal cual, sin copiarla dentro de un árbol
+            features = caracteristicas
+            nn_model = NearestNeighbors(n_neighbors=N_VECINOS, metric='euclidean', algorithm='brute')
+        with span('ajuste_modelo'):
+            nn_model.fit(features)
+        return data['title'], features, nn_model, columnas
+
+    # Devuelve un motor nuevo para una versión actualizada del dataset (ver
+    # indices.calcular_origen), reutilizando las filas de la matriz que no cambiaron.
+    # Si la matriz vino de memoria compartida (sin nombres de columnas) se construye de cero
+    def actualizar(self, data, origen):
+        _, features, _, columnas = self._estado
+        if columnas is None:
+            return MotorRecomendacion(data)
+        return MotorRecomendacion(data, *actualizar_caracteristicas(features, columnas, data, origen))
+
+    # Devuelve los títulos más parecidos a la película en la posición indicada
+    def recomendar(self, posicion, n=N_VECINOS - 1):
+        titulos, features, nn_model, _ = self._estado
+        with span('kneighbors'):
+            _, indices = nn_model.kneighbors(features[posicion:posicion + 1], n_neighbors=n + 1)
+
+        # Excluir la primera posición, que corresponde a la película original
+        return titulos.iloc[indices[0][1:]].tolist()
+
+    # Igual que recomendar, pero para varias películas con una sola llamada a kneighbors
+    def recomendar_lote(self, posiciones, n=N_VECINOS - 1):
+        titulos, features, nn_model, _ = self._estado
+        if len(posiciones) == 0:
+            return []
+        with span('kneighbors'):
+            _, indices = nn_model.kneighbors(features[posiciones], n_neighbors=n + 1)
+        recomendados = titulos.iloc[indices[:, 1:].ravel()].tolist()
+        return [recomendados[i:i + n] for i in range(0, len(recomendados), n)]
+
+# Motor de recomendación por similitud de títulos (TF-IDF).
+# La matriz TF-IDF se mantiene dispersa y en cada consulta se calcula solo la fila
+# de similitudes de la película buscada, en lugar de la matriz densa N x N completa
+class MotorTfidf:
+
+    def __init__(self, data, stop_words=None):
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        tfidf = TfidfVectorizer(stop_words=stop_words)
+        # TfidfVectorizer normaliza cada fila (norma L2), así que el producto punto
+        # entre filas es directamente la similitud del coseno
+        self._tfidf_matrix = tfidf.fit_transform(data['title']).tocsr()
+
+    # Similitudes de las películas en las posiciones [inicio, fin) con todas las demás
+    # (una fila por película). El producto se hace en el mismo orden que en vecinos, así
+    # los valores son exactamente los mismos
+    def similitudes(self, inicio, fin):
+        return (self._tfidf_matrix @ self._tfidf_matrix[inicio:fin].T).T.toarray()
+
+    # Devuelve las posiciones de las k películas más similares, ordenadas de mayor a
+    # menor similitud (la propia película normalmente ocupa el primer lugar)
+    def vecinos(self, posicion, k=N_VECINOS):
+        similitudes = (self._tfidf_matrix @ self._tfidf_matrix[posicion].T).toarray().ravel()
+        return mas_similares(similitudes, k).tolist()
+
+# Función: Posiciones de los k valores más altos de similitudes, de mayor a menor.
+# Selección parcial con np.partition: O(N) en lugar de ordenar toda la fila.
+# Ante empates se prefieren las posiciones menores, igual que un sort estable
+def mas_similares(similitudes, k):
+    k = min(k, len(similitudes))
+    umbral = np.partition(similitudes, -k)[-k]
+    mayores = np.flatnonzero(similitudes > umbral)
+    mayores = mayores[np.lexsort((mayores, -similitudes[mayores]))]
+    empatados = np.flatnonzero(similitudes == umbral)[:k - len(mayores)]
+    return np.concatenate([mayores, empatados])
+
+# Función: Vecinos de todas las películas con el mismo modelo que MotorRecomendacion,
+# consultando kneighbors de a bloques de filas (así la memoria queda acotada por el
+# bloque). Cada bloque se reparte entre varios hilos (n_jobs; por defecto, todos los
+# núcleos).
+# Devuelve las posiciones (int32) y las distancias (float32) de los k vecinos de cada una
+def vecinos_caracteristicas(data, k=N_VECINOS, filas_por_bloque=FILAS_POR_BLOQUE, procesos=None):
+    from sklearn.neighbors import NearestNeighbors
+    features, _ = matriz_caracteristicas(data)
+    nn_model = NearestNeighbors(n_neighbors=k, metric='euclidean', n_jobs=procesos or -1).fit(features)
+    posiciones = np.empty((len(features), k), dtype=np.int32)
+    distancias = np.empty((len(features), k), dtype=np.float32)
+    for inicio in range(0, len(features), filas_por_bloque):
+        distancias_bloque, posiciones_bloque = nn_model.kneighbors(features[inicio:inicio + filas_por_bloque])
+        posiciones[inicio:inicio + len(posiciones_bloque)] = posiciones_bloque
+        distancias[inicio:inicio + len(distancias_bloque)] = distancias_bloque
+    return posiciones, distancias
+
+# Función: Vecinos de todas las películas con el mismo criterio que MotorTfidf.vecinos.
+# Las similitudes se calculan de a bloques de filas (un producto de matrices dispersas por
+# bloque, de unos 32 MB como matriz densa) y los bloques se reparten entre varios hilos.
+# Devuelve las posiciones (int32) y las similitudes (float32) de los k vecinos de cada una
+def vecinos_tfidf(data, k=N_VECINOS, stop_words=None, procesos=None):
+    motor = MotorTfidf(data, stop_words=stop_words)
+    filas = len(data)
+    filas_por_bloque = max(1, 2 ** 22 // max(filas, 1))
+    posiciones = np.empty((filas, min(k, filas)), dtype=np.int32)
+    similitudes = np.empty((filas, min(k, filas)), dtype=np.float32)
+
+    def calcular_bloque(inicio):
+        for fila, similitudes_fila in enumerate(motor.similitudes(inicio, inicio + filas_por_bloque), start=inicio):
+            mayores = mas_similares(similitudes_fila, k)
+            posiciones[fila] = mayores
+            similitudes[fila] = similitudes_fila[mayores]
+
+    with ThreadPoolExecutor(procesos or os.cpu_count() or 1) as executor:
+        list(executor.map(calcular_bloque, range(0, filas, filas_por_bloque)))
+    return posiciones, similitudes
@@ -0,0 +1,31 @@
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+# Opciones de orjson: los escalares y arrays de numpy se serializan directamente (sin
+# convertirlos antes a tipos de Python) y se aceptan claves que no son texto
+OPCIONES_JSON = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+# JSON ya serializado que se inserta tal cual dentro de otra respuesta (por ejemplo las
+# películas de cada director, que se serializan una sola vez al construir el índice)
+Fragmento = orjson.Fragment
+
+# Función: Para los tipos que orjson no conoce (fechas de pandas, modelos de pydantic)
+# se usa la misma conversión que la respuesta JSON por defecto de FastAPI
+def convertir(valor):
+    return jsonable_encoder(valor)
+
+# Función: Convertir el resultado de un endpoint a los bytes JSON que se envían, en una
+# sola pasada y sin recorrerlo antes con jsonable_encoder
+def a_json(resultado):
+    return orjson.dumps(resultado, default=convertir, option=OPCIONES_JSON)
+
+# Respuesta JSON que serializa con orjson. Si el contenido ya son bytes JSON (por
+# ejemplo una respuesta guardada en el caché) se envía tal cual
+class RespuestaJSON(Response):
+    media_type = 'application/json'
+
+    def render(self, content):
+        if isinstance(content, bytes):
+            return content
+        return a_json(content)
@@ -0,0 +1,135 @@
+# Tabla de vecinos precalculada: para cada película, las posiciones de sus N_VECINOS
+# películas más cercanas (int32) y la distancia o similitud de cada una (float32).
+# Las recomendaciones dependen solo del dataset, así que la tabla se calcula una vez fuera
+# de la API (al final del ETL, o con este archivo) y la API la abre con np.load en modo
+# mmap: cada recomendación es una selección de filas de la tabla, sin sklearn y con el
+# mismo costo para cualquier tamaño del dataset.
+# Hay una tabla por modelo: 'caracteristicas' (popularidad + géneros, el de main.py) y
+# 'tfidf' (similitud de títulos, el de mainLocal.py). Junto a la tabla se guarda una huella
+# de las columnas de las que depende el modelo: si el dataset cambió, la tabla no se usa.
+#
+# Uso:
+#   python vecinos.py                                         (tabla de main.py)
+#   python vecinos.py --modelo tfidf --artefacto PI_RuthCastañeda/data_preparada.parquet \
+#       --csv PI_RuthCastañeda/data_preparada_parte1.csv PI_RuthCastañeda/data_preparada_parte2.csv
+import argparse
+import hashlib
+import json
+import os
+import time
+import numpy as np
+import pandas as pd
+from carga import RUTA_ARTEFACTO, RUTA_DATOS, cargar_datos
+from metricas import span
+
+# Cantidad de vecinos que se consultan: la película buscada más 5 recomendaciones
+N_VECINOS = 6
+
+# Columnas de las que depende cada modelo (además del id, que fija el orden de las filas)
+COLUMNAS_MODELO = {'caracteristicas': ['id', 'popularity', 'genre'], 'tfidf': ['id', 'title']}
+
+# Palabras vacías del modelo TF-IDF de mainLocal.py
+PALABRAS_VACIAS = ['the', 'and', 'in', 'of']
+
+# Función: Rutas de la tabla de un modelo, junto al artefacto del ETL: las posiciones, los
+# puntajes y los metadatos (el modelo, sus parámetros y la huella del dataset)
+def rutas_vecinos(ruta_artefacto=RUTA_ARTEFACTO, modelo='caracteristicas'):
+    base = f'{os.path.splitext(ruta_artefacto)[0]}.vecinos_{modelo}'
+    return base + '.npy', base + '.puntajes.npy', base + '.json'
+
+# Función: Huella del dataset para un modelo: un hash de las columnas que usa el modelo
+# (en el orden de las filas) y de sus parámetros
+def huella(data, modelo, parametros=None):
+    hashes = pd.util.hash_pandas_object(data[COLUMNAS_MODELO[modelo]], index=False).to_numpy()
+    resumen = hashlib.blake2b(hashes.tobytes(), digest_size=8)
+    resumen.update(json.dumps(parametros or {}, sort_keys=True).encode())
+    return resumen.hexdigest()
+
+# Función: Calcular la tabla de vecinos de un modelo para todo el dataset. Devuelve las
+# posiciones y los puntajes (distancias para 'caracteristicas', similitudes para 'tfidf')
+def calcular_vecinos(data, modelo='caracteristicas', procesos=None, parametros=None):
+    # recomendador importa N_VECINOS de este módulo: se importa aquí para no formar un ciclo
+    from recomendador import vecinos_caracteristicas, vecinos_tfidf
+    if modelo == 'tfidf':
+        return vecinos_tfidf(data, N_VECINOS, procesos=procesos, **(parametros or {}))
+    return vecinos_caracteristicas(data, N_VECINOS, procesos=procesos)
+
+# Función: Calcular y guardar la tabla de vecinos de un modelo. Los archivos se escriben
+# con otro nombre y se renombran, los metadatos al final: la API nunca lee una tabla a
+# medio escribir. Devuelve los metadatos
+def escribir_vecinos(data, ruta_artefacto=RUTA_ARTEFACTO, modelo='caracteristicas', procesos=None, parametros=None):
+    inicio = time.perf_counter()
+    posiciones, puntajes = calcular_vecinos(data, modelo, procesos, parametros)
+    ruta_posiciones, ruta_puntajes, ruta_metadatos = rutas_vecinos(ruta_artefacto, modelo)
+    for ruta, valores in ((ruta_posiciones, posiciones), (ruta_puntajes, puntajes)):
+        with open(ruta + '.tmp', 'wb') as archivo:
+            np.save(archivo, valores)
+        os.replace(ruta + '.tmp', ruta)
+    metadatos = {'modelo': modelo, 'filas': len(data), 'vecinos': posiciones.shape[1],
+                 'parametros': parametros or {}, 'huella': huella(data, modelo, parametros),
+                 'segundos': round(time.perf_counter() - inicio, 3)}
+    with open(ruta_metadatos + '.tmp', 'w', encoding='utf-8') as archivo:
+        json.dump(metadatos, archivo)
+    os.replace(ruta_metadatos + '.tmp', ruta_metadatos)
+    return metadatos
+
+# Función: Abrir la tabla de vecinos de un modelo (en modo mmap: no se copia a memoria).
+# Devuelve None si no existe o si no corresponde al dataset o a los parámetros
+def leer_vecinos(data, ruta_artefacto=RUTA_ARTEFACTO, modelo='caracteristicas', parametros=None):
+    ruta_posiciones, _, ruta_metadatos = rutas_vecinos(ruta_artefacto, modelo)
+    try:
+        with open(ruta_metadatos, encoding='utf-8') as archivo:
+            metadatos = json.load(archivo)
+        if metadatos['filas'] != len(data) or metadatos['huella'] != huella(data, modelo, parametros):
+            return None
+        posiciones = np.load(ruta_posiciones, mmap_mode='r')
+    except (OSError, ValueError, KeyError):
+        return None
+    return posiciones if posiciones.shape[0] == len(data) else None
+
+# Motor de recomendación a partir de la tabla de vecinos precalculada: responde igual
+# que MotorRecomendacion, pero cada consulta es solo una selección de filas de la tabla
+class MotorTabla:
+
+    def __init__(self, data, posiciones):
+        # Se mantiene la misma interfaz que MotorRecomendacion (la versión es siempre 0:
+        # la tabla no se reconstruye, una tabla nueva llega con una instantánea nueva)
+        self.version = 0
+        self._titulos = data['title'].to_numpy(dtype=object)
+        self._posiciones = posiciones
+
+    # La tabla corresponde a un dataset fijo: para otra versión del dataset sin tabla
+    # propia se construye el modelo (ver estado.Instantanea.actualizar)
+    def actualizar(self, data, origen):
+        from recomendador import MotorRecomendacion
+        return MotorRecomendacion(data)
+
+    # Devuelve los títulos más parecidos a la película en la posición indicada
+    # (se excluye la primera columna, que corresponde a la película original)
+    def recomendar(self, posicion, n=N_VECINOS - 1):
+        with span('tabla_vecinos'):
+            return self._titulos[self._posiciones[posicion, 1:n + 1]].tolist()
+
+    # Igual que recomendar, pero para varias películas con una sola selección
+    def recomendar_lote(self, posiciones, n=N_VECINOS - 1):
+        if len(posiciones) == 0:
+            return []
+        with span('tabla_vecinos'):
+            return self._titulos[self._posiciones[posiciones, 1:n + 1]].tolist()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Tabla de vecinos precalculada para las recomendaciones")
+    parser.add_argument('--modelo', choices=list(COLUMNAS_MODELO), default='caracteristicas')
+    parser.add_argument('--artefacto', default=RUTA_ARTEFACTO)
+    parser.add_argument('--csv', nargs='+', default=[RUTA_DATOS],
+                        help="CSV del dataset si no existe el artefacto")
+    parser.add_argument('--workers', type=int, default=None,
+                        help="hilos para calcular los vecinos (por defecto, todos los núcleos)")
+    args = parser.parse_args()
+
+    # El dataset se carga igual que en la API (con tipos compactos), así la huella coincide
+    data = cargar_datos(args.artefacto, args.csv)
+    parametros = {'stop_words': PALABRAS_VACIAS} if args.modelo == 'tfidf' else None
+    metadatos = escribir_vecinos(data, args.artefacto, args.modelo, args.workers, parametros)
+    print(f"Tabla de vecinos '{args.modelo}' de {metadatos['filas']} películas escrita en "
+          f"{rutas_vecinos(args.artefacto, args.modelo)[0]} ({metadatos['segundos']:.1f} s)")